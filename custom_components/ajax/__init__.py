@@ -1,14 +1,18 @@
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+import asyncio
 import logging
 import time
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+import aiohttp
 from .const import DOMAIN
-from .api import AjaxAPI
-from .device_mapper import map_ajax_device
-from homeassistant.core import CoreState
-from homeassistant.exceptions import ConfigEntryAuthFailed
+from .api import AjaxAPIError
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from .integration_startup import do_setup
+from .snapshot import AjaxSnapshot, entry_snapshot_data
+from .tokens import AjaxTokenStore
+from .trace import trace
+import voluptuous as vol
+import homeassistant.helpers.config_validation as cv
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -27,35 +31,69 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "user_id": entry.data["user_id"],
         # "api_key": entry.data["api_key"],
         "hubs": None,
-        "devices": None,        
+        "devices": None,
+        "coordinators": {},
     }
+    _async_register_services(hass)
 
+    try:
+        return await do_setup(hass, entry)
+    except ConfigEntryAuthFailed as e:
+        _LOGGER.error("Ajax authorisation error: %s", e)
+        raise
+    except (AjaxAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # Cloud unreachable or failing, Home Assistant retries the setup
+        raise ConfigEntryNotReady(f"Ajax cloud not available: {e!r}") from e
 
-    try:    
-       
-        setup_result = await do_setup(hass, entry)   
-            
-        return setup_result
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    data = hass.data[DOMAIN].get(entry.entry_id, {})
+    # Only what setup got to forward; a failed setup may have loaded nothing
+    loaded_platforms = data.get("loaded_platforms", [])
+    _LOGGER.debug("Loaded platforms to unload: %s", loaded_platforms)
 
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, loaded_platforms)
+    _LOGGER.debug("Unload ok: %s", unload_ok)
+    if not unload_ok:
+        return False
 
-    except Exception as e:
-        _LOGGER.error(f"Ajax authorisation error: {e}")
-        raise ConfigEntryAuthFailed
+    # Background tasks, timers and the event stream are stopped through
+    # entry.async_on_unload; what is left holds the hub state
+    for coordinator in data.get("coordinators", {}).values():
+        await coordinator.async_shutdown()
+    if data.get("api"):
+        # The next setup reads them back, don't leave them in a pending write
+        await data["api"].async_save_tokens()
+    if data.get("snapshot") and data.get("coordinators"):
+        # Write the pending delayed save now instead of keeping its data around
+        await data["snapshot"].async_save(*entry_snapshot_data(data))
+    hass.data[DOMAIN].pop(entry.entry_id, None)
+    if not hass.data[DOMAIN]:
+        hass.services.async_remove(DOMAIN, SERVICE_SET_TRACE)
+    return True
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    
-
-    # Remove platforms (sensor, binary_sensor, etc.)
-    platforms = entry.data.get("platforms", [])
-    _LOGGER.error(f"PLATFORMS:{platforms}")
-    loaded_platforms = hass.data[DOMAIN][entry.entry_id].get("loaded_platforms", [])
-    _LOGGER.error(f"Loaded platforms to unload: {loaded_platforms}")
-
-    if platforms:
-        _LOGGER.error("PLATFORMS TRUE")
-        unload_ok = await hass.config_entries.async_unload_platforms(entry, loaded_platforms)
-        _LOGGER.error("PLATFORMS FALSE")
-        unload_ok = True
-
-    _LOGGER.error(f"UNLOAD:{unload_ok}")
-    return bool(unload_ok)
\ No newline at end of file
+
+SERVICE_SET_TRACE = "set_trace"
+SET_TRACE_SCHEMA = vol.Schema(
+    {
+        vol.Required("enabled"): cv.boolean,
+        vol.Optional("sample_rate", default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1)
+        ),
+    }
+)
+
+
+def _async_register_services(hass):
+    if hass.services.has_service(DOMAIN, SERVICE_SET_TRACE):
+        return
+
+    async def _set_trace(call):
+        trace.configure(call.data["enabled"], call.data["sample_rate"])
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_TRACE, _set_trace, schema=SET_TRACE_SCHEMA)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # Drop the stored hubs/devices snapshot and tokens together with the entry
+    await AjaxSnapshot(hass, entry.entry_id).async_remove()
+    await AjaxTokenStore(hass, entry.entry_id).async_remove()
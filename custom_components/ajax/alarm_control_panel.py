@@ -1,35 +1,49 @@
 from homeassistant.components.alarm_control_panel.const import AlarmControlPanelEntityFeature
 from homeassistant.components.alarm_control_panel import AlarmControlPanelEntity, AlarmControlPanelState
 from homeassistant.const import STATE_UNKNOWN
-from datetime import timedelta
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import time
 import logging
-import asyncio
 
-from .api import AjaxAPI
 from .const import DOMAIN
 
 
-SCAN_INTERVAL = timedelta(seconds=15)
-
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     data = hass.data[DOMAIN][config_entry.entry_id]
     api = hass.data[DOMAIN][config_entry.entry_id]["api"]
+    coordinators = data["coordinators"]
     hubs = data.get("hubs", [])
-    entities = [AjaxAlarmPanel(api, hub["hubId"]) for hub in hubs]
-    async_add_entities(entities, update_before_add=True)
+
+    @callback
+    def add_hub(hub_id):
+        async_add_entities([AjaxAlarmPanel(coordinators[hub_id], api, hub_id)])
+
+    # For hubs added to the account later
+    data["hub_adder"] = add_hub
+    entities = [AjaxAlarmPanel(coordinators[hub["hubId"]], api, hub["hubId"]) for hub in hubs]
+    # Don't hold up setup on a round-trip per hub, the state is fetched once added
+    async_add_entities(entities)
 
 
-class AjaxAlarmPanel(AlarmControlPanelEntity):
-    def __init__(self, api, hub_id):
+class AjaxAlarmPanel(CoordinatorEntity, AlarmControlPanelEntity):
+    def __init__(self, coordinator, api, hub_id):
+        super().__init__(coordinator)
         self.api = api
         self.hub_id = hub_id
         self._attr_name = f"Ajax Hub {hub_id}"
         self._raw_state = STATE_UNKNOWN
         self._hub_name_from_api = None
+        self._firmware_version = None
+        self._serial_number = None
+        self._model_version = None
+        self._transitional_state = None
+        self._written_available = None
+        if coordinator.hub_info:
+            self._update_from_hub(coordinator.hub_info)
 
     def map_ajax_state_to_ha(self, state):
         if state in ["DISARMED_NIGHT_MODE_OFF", "DISARMED_NIGHT_MODE_ON", "DISARMED"]:
@@ -49,55 +63,77 @@ class AjaxAlarmPanel(AlarmControlPanelEntity):
 
     @property
     def alarm_state(self):
+        if self._transitional_state:
+            return self._transitional_state
         return self.map_ajax_state_to_ha(self._raw_state)
 
     async def async_added_to_hass(self):
-        await self.async_update()
-
-    async def async_update(self):
-        start = time.perf_counter()
-        hub_info = await self.api.get_hub_info(self.hub_id)
-        _LOGGER.error("API response time: %.2f sec", time.perf_counter() - start)
+        await super().async_added_to_hass()
+        if self.coordinator.hub_info is None:
+            # Fetch the hub state in the background rather than waiting a poll interval
+            self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def _handle_coordinator_update(self):
+        hub_info = self.coordinator.hub_info
         if not hub_info:
-            _LOGGER.error(f"Hub info is not available for update {self.hub_id}")
+            _LOGGER.debug("Hub info is not available for update %s", self.hub_id)
+            return
+        self._update_from_hub(hub_info)
+        # Only write when the panel actually shows something new
+        available = self.available
+        if available == self._written_available and self.coordinator.hub_changed_fields.isdisjoint(
+            ("state", "name")
+        ):
             return
-    
-        if hub_info:
-            self._raw_state = hub_info["state"]
-            self._hub_name_from_api = hub_info["name"]
-    		# Salva i campi che ti interessano
-            self._firmware_version = hub_info.get("firmware", {}).get("version")
-            self._serial_number = hub_info.get("id")
-            # Se l’API fornisce hw data
-            self._model_version = hub_info.get("hubSubtype")
-            if self.entity_id:
-                self.async_schedule_update_ha_state()
+        self._written_available = available
+        self.async_write_ha_state()
+
+    def _update_from_hub(self, hub_info):
+        self._raw_state = hub_info["state"]
+        self._hub_name_from_api = hub_info["name"]
+        # Salva i campi che ti interessano
+        self._firmware_version = hub_info.get("firmware", {}).get("version")
+        self._serial_number = hub_info.get("id")
+        # Se l’API fornisce hw data
+        self._model_version = hub_info.get("hubSubtype")
 
 
     async def async_alarm_disarm(self, code=None):
-        _LOGGER.info("Disarm called")
-        start = time.perf_counter()
-        await self.api.disarm_hub(self.hub_id)
-        _LOGGER.error("API disarm time: %.2f sec", time.perf_counter() - start)
-        await asyncio.sleep(1)
-        await self.async_update()
-        
+        _LOGGER.debug("Disarm called")
+        await self._async_send_command(
+            self.api.disarm_hub, AlarmControlPanelState.DISARMING, AlarmControlPanelState.DISARMED
+        )
 
     async def async_alarm_arm_away(self, code=None):
-        _LOGGER.info("Arm away called")
-        start = time.perf_counter()
-        await self.api.arm_hub(self.hub_id)
-        _LOGGER.error("API arm time: %.2f sec", time.perf_counter() - start)
-        await asyncio.sleep(1)
-        await self.async_update()
-        
+        _LOGGER.debug("Arm away called")
+        await self._async_send_command(
+            self.api.arm_hub, AlarmControlPanelState.ARMING, AlarmControlPanelState.ARMED_AWAY
+        )
 
     async def async_alarm_arm_night(self, code=None):
-        _LOGGER.info("Arm night called")
-        await self.api.arm_hub_night(self.hub_id)
-        await asyncio.sleep(1)
-        await self.async_update()
-        
+        _LOGGER.debug("Arm night called")
+        await self._async_send_command(
+            self.api.arm_hub_night, AlarmControlPanelState.ARMING, AlarmControlPanelState.ARMED_NIGHT
+        )
+
+    async def _async_send_command(self, send, transitional_state, target_state):
+        # Show arming/disarming right away, then poll until the hub confirms
+        self._transitional_state = transitional_state
+        self.async_write_ha_state()
+        try:
+            start = time.perf_counter()
+            await send(self.hub_id)
+            _LOGGER.debug("API command time: %.2f sec", time.perf_counter() - start)
+            self.coordinator.note_command()
+            confirmed = await self.coordinator.async_confirm_hub_state(
+                lambda state: self.map_ajax_state_to_ha(state) == target_state
+            )
+        finally:
+            self._transitional_state = None
+            self.async_write_ha_state()
+        if not confirmed:
+            _LOGGER.warning("Hub %s did not report %s in time", self.hub_id, target_state)
 
     @property
     def code_format(self):
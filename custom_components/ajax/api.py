@@ -1,12 +1,32 @@
 import aiohttp
+import asyncio
 import logging
+import random
 import time
 import functools
-from aiohttp import ClientResponseError
-from .const import DEFAULT_API_URL
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
-from homeassistant.core import CoreState
+from .cache import ResponseCache
+from .metrics import ApiMetrics
+from .ratelimit import LANE_COMMAND, LANE_POLL, AccountRateLimiter
+from .trace import trace
+from .const import (
+    DEFAULT_API_URL,
+    DEFAULT_CACHE_TTLS,
+    DEFAULT_CACHE_MAX_ENTRIES,
+    EVENT_STREAM_READ_TIMEOUT,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_COMMAND_RESERVE,
+    RATE_LIMIT_RATE,
+    READ_RETRIES,
+    REQUEST_TIMEOUTS,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    SESSION_TOKEN_LIFETIME,
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_RETRY,
+)
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_call_later
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,27 +34,63 @@ class AjaxAPIError(Exception):
     """Exception raised for Ajax API errors."""
     pass
 
-def handle_unauthorized(func):
+class EventStreamUnsupported(AjaxAPIError):
+    """The proxy has no event stream endpoint."""
+
+def single_flight(func):
+    """Let concurrent identical reads share one in-flight request.
+
+    Callers asking for the same method with the same arguments while a request
+    is still running await that request instead of opening their own POST, and
+    all of them get the same parsed result (or the same exception).
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args):
+        key = (func.__name__, *args)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(self, *args))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._release_inflight, key))
+        # Shield so that one cancelled caller doesn't cancel the shared request
+        return await asyncio.shield(task)
+    return wrapper
+
+def cached(func):
+    """Serve reads from the response cache while they are fresh.
+
+    The first argument of the wrapped method must be the hub id, which is what
+    commands invalidate on. ``fresh=True`` skips the cache lookup but still
+    stores the new response.
+    """
     @functools.wraps(func)
-    async def wrapper(self, *args, **kwargs):
+    async def wrapper(self, *args, fresh=False):
+        key = (func.__name__, *args)
+        result = None if fresh else self.cache.get(key)
+        if result is not None:
+            return result
+        generation = self.cache.generation(args[0])
+        result = await func(self, *args)
+        if result is not None:
+            self.cache.set(key, result, generation)
+        return result
+    return wrapper
+
+def invalidates_hub(func):
+    """Drop the cached reads of a hub once a command was sent to it."""
+    @functools.wraps(func)
+    async def wrapper(self, hub_id, *args, **kwargs):
         try:
-            return await func(self, *args, **kwargs)
-        except ClientResponseError as e:
-            if e.status == 401:
-                _LOGGER.warning("Unauthorized! Trying to refresh token...")
-                try:
-                    await self.update_refresh_token()
-                    return await func(self, *args, **kwargs)
-                except Exception as refresh_error:
-                    _LOGGER.error("Token refresh failed: %s", refresh_error)
-                    raise
-            raise
+            return await func(self, hub_id, *args, **kwargs)
+        finally:
+            # Also on failure: the hub may have applied the command anyway
+            self.invalidate_hub(hub_id)
     return wrapper
 
 class AjaxAPI:
     base_url = DEFAULT_API_URL
 
-    def __init__(self, data, hass=None, entry=None, session = None):
+    def __init__(self, data, hass=None, entry=None, session = None, cache_ttls=None, cache_size=None, token_store=None):
         self.session_token = data["session_token"]
         # self.api_key = data["api_key"]
         self.user_id = data["user_id"]
@@ -42,35 +98,156 @@ class AjaxAPI:
         self.hass = hass
         self.entry = entry
         self.session = session
+        self.token_store = token_store
         self.headers = {
             "X-Session-Token": self.session_token
             # "X-Api-Key": self.api_key
         }
         self.session_created_at = data.get("token_created_at", time.time())
-        self._reauth_in_progress = False
+        self._inflight = {}
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_timer = None
+        self._refresh_scheduled = False
+        self.cache = ResponseCache(
+            cache_ttls if cache_ttls is not None else DEFAULT_CACHE_TTLS,
+            cache_size or DEFAULT_CACHE_MAX_ENTRIES,
+        )
+        self.metrics = ApiMetrics()
+        self.rate_limiter = AccountRateLimiter(
+            RATE_LIMIT_RATE, RATE_LIMIT_BURST, RATE_LIMIT_COMMAND_RESERVE
+        )
+
+    def _release_inflight(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def invalidate_hub(self, hub_id):
+        """Forget cached and in-flight reads of a hub after a command."""
+        self.cache.invalidate_hub(hub_id)
+        for key in [key for key in self._inflight if key[1] == hub_id]:
+            del self._inflight[key]
 
     def is_token_expired(self):
         # Token expires after 14 minutes
-        return time.time() - self.session_created_at > 14 * 60
-    
-    def is_refresh_token_old(self):
-        # Refresh token expires after 7 days
-        token_created_at = self.entry.data.get("token_created_at", 0) if self.entry else 0
-        return time.time() - token_created_at > 7 * 24 * 60 * 60
+        return time.time() - self.session_created_at > SESSION_TOKEN_LIFETIME
 
     async def ensure_token_valid(self):
-        _LOGGER.error("Token is valid check")
         if self.is_token_expired():
-            _LOGGER.error("Token expired, refreshing...")
+            _LOGGER.debug("Session token expired, refreshing")
+            await self._refresh_token_for_request()
+
+    async def _refresh_token_for_request(self):
+        """Refresh the session token for a request that has to wait for it."""
+        start = time.monotonic()
+        try:
             await self.update_refresh_token()
+        finally:
+            self.metrics.record_token_wait(time.monotonic() - start)
+
+
+    @callback
+    def async_start_token_refresh(self):
+        """Refresh the session token in the background shortly before it expires.
+
+        Keeps user-facing requests, arm/disarm above all, from paying for the
+        refresh round-trip.
+        """
+        self.async_stop_token_refresh()
+        self._refresh_scheduled = True
+        delay = self.session_created_at + SESSION_TOKEN_LIFETIME - TOKEN_REFRESH_MARGIN - time.time()
+        self._refresh_timer = async_call_later(self.hass, max(delay, 0), self._token_refresh_due)
+
+    @callback
+    def async_set_tokens(self, session_token, refresh_token, created_at):
+        """Switch the running API to tokens from a new login, e.g. after reauth."""
+        self.session_token = session_token
+        self.refresh_token = refresh_token
+        self.headers["X-Session-Token"] = session_token
+        self.session_created_at = created_at
+        if self.token_store:
+            self.hass.async_create_task(self.async_save_tokens())
+        if self._refresh_scheduled:
+            # A rejected scheduled refresh isn't retried, plan the next one
+            self.async_start_token_refresh()
+
+    def tokens(self):
+        return {
+            "session_token": self.session_token,
+            "refresh_token": self.refresh_token,
+            "token_created_at": self.session_created_at,
+        }
+
+    async def async_save_tokens(self):
+        """Write the current tokens now, e.g. on unload."""
+        if self.token_store:
+            await self.token_store.async_save(self.tokens())
 
+    @callback
+    def async_stop_token_refresh(self):
+        self._refresh_scheduled = False
+        if self._refresh_timer:
+            self._refresh_timer()
+            self._refresh_timer = None
+
+    @callback
+    def _token_refresh_due(self, _now):
+        self._refresh_timer = None
+        self.hass.async_create_background_task(
+            self._proactive_token_refresh(), "ajax_token_refresh"
+        )
+
+    async def _proactive_token_refresh(self):
+        if not self._refresh_scheduled:
+            return
+        try:
+            await self.update_refresh_token()
+        except ConfigEntryAuthFailed:
+            # Requests will fail with it too and start the reauth flow
+            _LOGGER.warning("Scheduled token refresh was rejected")
+            return
+        except Exception as e:
+            _LOGGER.warning("Scheduled token refresh failed, retrying: %s", e)
+            if not self._refresh_scheduled:
+                return
+            self._refresh_timer = async_call_later(
+                self.hass, TOKEN_REFRESH_RETRY, self._token_refresh_due
+            )
+            return
 
     async def update_refresh_token(self):
-        _LOGGER.error("Refreshing token")
-        _LOGGER.error(f"{self.hass.state}")
+        """Refresh the session token, once for all concurrent callers.
+
+        A caller that had to wait for a refresh started by someone else reuses
+        its result instead of sending another refresh POST.
+        """
+        stale_token = self.session_token
+        async with self._refresh_lock:
+            if self.session_token != stale_token:
+                return True
+            start = time.monotonic()
+            try:
+                result = await self._refresh_tokens()
+            except Exception:
+                self.metrics.record("refresh", time.monotonic() - start, error=True)
+                self.metrics.record_token_refresh(False)
+                raise
+            self.metrics.record("refresh", time.monotonic() - start)
+            self.metrics.record_token_refresh(True)
+        if self._refresh_scheduled:
+            # Refreshed on demand, move the scheduled refresh accordingly
+            self.async_start_token_refresh()
+        return result
+
+    async def _refresh_tokens(self):
+        _LOGGER.debug("Refreshing session token")
         # if self.hass.state != "RUNNING":
         #     _LOGGER.warning("HA not running yet, skipping token refresh")
         #     return
+        # Every request waits for it, so it goes ahead of the polls
+        await self._wait_for_rate_limit(LANE_COMMAND)
         try:
 
             async with self.session.post(
@@ -78,14 +255,15 @@ class AjaxAPI:
                 json={
                     "user_id": self.user_id,
                     "refresh_token": self.refresh_token
-                }
+                },
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUTS["refresh"]),
             ) as resp:
 
                 # check response status
                 if resp.status == 401 or resp.status == 403:
                     # Unauthorized — token
                     text = await resp.text()
-                    _LOGGER.error(f"Refresh token unauthorized: {resp.status} {text}")
+                    _LOGGER.warning("Refresh token unauthorized: %s %s", resp.status, text)
                     raise ConfigEntryAuthFailed(f"Unauthorized refresh token: {resp.status}")
 
                 resp.raise_for_status()  # raises exception for another HTTP errors
@@ -93,226 +271,237 @@ class AjaxAPI:
                 data = await resp.json()
                 # refreshing tokens here
 
+        except ConfigEntryAuthFailed:
+            raise
         except aiohttp.ClientResponseError as e:
-            _LOGGER.error(f"HTTP error during token refresh: {e}")
+            _LOGGER.warning("HTTP error during token refresh: %s", e)
+            if e.status >= 500:
+                raise AjaxAPIError(f"Token refresh failed: {e}") from e
             raise ConfigEntryAuthFailed(f"HTTP error: {e}") from e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Network trouble says nothing about the tokens, don't ask for reauth
+            _LOGGER.warning("Network error during token refresh: %r", e)
+            raise AjaxAPIError(f"Token refresh failed: {e!r}") from e
         except Exception as e:
-            _LOGGER.error(f"Unexpected error during token refresh: {e}")
+            _LOGGER.error("Unexpected error during token refresh: %s", e)
             raise ConfigEntryAuthFailed
 
         if ("sessionToken" not in data or
             "refreshToken" not in data or
-            data.get("message") == "User is not authorized"):
-            _LOGGER.error(f"Failed to refresh token! Response: {data}")
+            _is_unauthorized(data)):
+            _LOGGER.error(
+                "Failed to refresh token, response: %s",
+                data.get("message") if isinstance(data, dict) else data,
+            )
             # Check if refresh token is expired (older than 7 days)
             if hasattr(self, 'hass') and self.hass and hasattr(self, 'entry') and self.entry:
-                raise 
+                raise ConfigEntryAuthFailed(f"Refresh token rejected: {data}")
             raise AjaxAPIError(f"Refresh token expired or invalid. Please re-authenticate: {data}")
 
+        rotated = data["refreshToken"] != self.refresh_token
         self.session_token = data["sessionToken"]
         self.refresh_token = data["refreshToken"]
         self.headers["X-Session-Token"] = self.session_token
-        self.session_created_at = time.time()    
-
-        # Save new tokens to config entry
-        _LOGGER.error(f"HASS: {self.hass!r} ({bool(self.hass)}) ENTRY: {self.entry!r} ({bool(self.entry)})")
-        if self.hass and self.entry:
-            _LOGGER.error("TRUE")
-            self.hass.config_entries.async_update_entry(
-                self.entry,
-                data={
-                    **self.entry.data,
-                    "session_token": self.session_token,
-                    "refresh_token": self.refresh_token,
-                    "token_created_at": self.session_created_at,
-                }
-            )
-            _LOGGER.error("Entry updated with new tokens")
-            return True
-        # Also update runtime data cache
-        if hasattr(self.hass, "data") and hasattr(self.entry, "domain"):
-            self.hass.data[self.entry.domain][self.entry.entry_id].update({
+        self.session_created_at = time.time()
+
+        if self.token_store:
+            if rotated:
+                # Losing a rotated refresh token would mean a reauth
+                await self.async_save_tokens()
+            else:
+                self.token_store.async_delay_save(self.tokens)
+            _LOGGER.debug("Stored new tokens%s", " (refresh token rotated)" if rotated else "")
+        return True
+
+    async def _wait_for_rate_limit(self, lane):
+        waited = await self.rate_limiter.acquire(lane)
+        self.metrics.record_queue_wait(lane, waited)
+
+    async def _request(self, operation, path, payload=None, method="POST", idempotent=True):
+        """Send an API call and return its parsed JSON body.
+
+        Every call goes through here: the session token is checked first, a
+        401 or "User is not authorized" body refreshes it and the call is sent
+        once more, and each operation gets its own timeout budget from
+        REQUEST_TIMEOUTS. Each attempt waits for the account rate limiter,
+        commands in its priority lane. Idempotent reads are retried on network
+        errors, timeouts and 5xx with exponential, jittered backoff; commands
+        are never retried so they fail fast. Returns None for responses without
+        content.
+        """
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUTS[operation])
+        retries = READ_RETRIES if idempotent else 0
+        lane = LANE_POLL if idempotent else LANE_COMMAND
+        attempt = 0
+        reauthorized = False
+        while True:
+            await self.ensure_token_valid()
+            body = {
+                "user_id": self.user_id,
                 "session_token": self.session_token,
-                "refresh_token": self.refresh_token,
-                "token_created_at": self.session_created_at,
-            })
-            _LOGGER.error("Hass updated with new tokens")
-            return True
-        
-
-    @handle_unauthorized
-    async def get_hubs(self):
+                **(payload or {}),
+            }
+            await self._wait_for_rate_limit(lane)
+            start = time.monotonic()
+            try:
+                async with self.session.request(
+                    method, f"{self.base_url}{path}", json=body, timeout=timeout
+                ) as resp:
+                    hit = resp.headers.get("X-Ajax-Origin-Hit")
+                    if hit is not None:
+                        self.metrics.record_origin_hit(hit)
+                    trace(
+                        "request",
+                        operation=operation,
+                        status=resp.status,
+                        seconds=time.monotonic() - start,
+                        origin_hit=hit,
+                        attempt=attempt,
+                    )
+                    if resp.status == 204:
+                        self.metrics.record(operation, time.monotonic() - start)
+                        return None
+                    if resp.status == 401:
+                        data = None
+                    else:
+                        resp.raise_for_status()
+                        data = await resp.json(content_type=None) if await resp.read() else None
+            except aiohttp.ClientResponseError as e:
+                self.metrics.record(operation, time.monotonic() - start, error=True)
+                if e.status < 500 or attempt >= retries:
+                    raise
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.record(operation, time.monotonic() - start, error=True)
+                if attempt >= retries:
+                    raise AjaxAPIError(f"{operation} failed: {e!r}") from e
+                error = e
+            else:
+                authorized = resp.status != 401 and not _is_unauthorized(data)
+                self.metrics.record(operation, time.monotonic() - start, error=not authorized)
+                if authorized:
+                    return data
+                if reauthorized:
+                    raise ConfigEntryAuthFailed(f"{operation}: still unauthorized after token refresh")
+                _LOGGER.warning("Unauthorized in %s, refreshing token...", operation)
+                await self._refresh_token_for_request()
+                reauthorized = True
+                continue
+
+            delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            _LOGGER.warning(
+                "%s failed (%s), retry %d/%d in %.2f sec", operation, error, attempt, retries, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def open_event_stream(self):
+        """Open the proxy's server-sent event stream of device and hub changes.
+
+        Returns the streaming response; the caller reads it and closes it.
+        """
         await self.ensure_token_valid()
-        _LOGGER.error("HEADERS: %s", self.headers)
-        async with self.session.get(
-            f"{self.base_url}/api/hubs",
-                json={
-                    "user_id": self.user_id,
-                    "session_token": self.session_token
-                }
-        ) as resp:
-            data = await resp.json()
-            
-        
-        # Check if response contains error
-        if isinstance(data, dict) and data.get("message") == "User is not authorized":
-            _LOGGER.warning("User is not authorized in get_hubs response: %s", data)
-
-
-            # Try to refresh the token
-            refreshed = await self.update_refresh_token()
-            _LOGGER.error(f"REFRESHED:{refreshed}")
-        
-
-            if not refreshed:
-                # Create notification if refresh failed and no reauth in progress
-                raise ConfigEntryAuthFailed
-            #Retry the request with new token
-            return await self.get_hubs()
-        
+        await self._wait_for_rate_limit(LANE_POLL)
+        try:
+            resp = await self.session.post(
+                f"{self.base_url}/api/events",
+                json={"user_id": self.user_id, "session_token": self.session_token},
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=REQUEST_TIMEOUTS["events"],
+                    sock_read=EVENT_STREAM_READ_TIMEOUT,
+                ),
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise AjaxAPIError(f"Opening the event stream failed: {e!r}") from e
+        if resp.status == 404:
+            resp.close()
+            raise EventStreamUnsupported("No event stream on this proxy")
+        if resp.status == 401:
+            resp.close()
+            await self._refresh_token_for_request()
+            raise AjaxAPIError("Event stream unauthorized, token refreshed")
+        try:
+            resp.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            resp.close()
+            raise AjaxAPIError(f"Opening the event stream failed: {e}") from e
+        if resp.content_type != "text/event-stream":
+            # A JSON answer instead of a stream, e.g. "User is not authorized"
+            try:
+                body = await resp.json(content_type=None)
+            except (ValueError, aiohttp.ClientError, asyncio.TimeoutError):
+                body = None
+            finally:
+                resp.close()
+            if _is_unauthorized(body):
+                await self._refresh_token_for_request()
+                raise AjaxAPIError("Event stream unauthorized, token refreshed")
+            raise AjaxAPIError(f"Event stream answered with {resp.content_type}")
+        return resp
+
+    async def get_hubs(self):
+        data = await self._request("get_hubs", "/api/hubs", method="GET")
+
         # Ensure we return a list
         if not isinstance(data, list):
-            _LOGGER.error("Expected list of hubs, got: %s", type(data))
-            _LOGGER.error("HUBS got: %s", data)
+            _LOGGER.warning("Expected a list of hubs, got %s", type(data).__name__)
+            trace("get_hubs_unexpected", response=data)
             return []
             
         return data
 
-    @handle_unauthorized
+    @cached
+    @single_flight
     async def get_hub_info(self, hub_id):
-        start = time.perf_counter()
-        await self.ensure_token_valid()
-        async with self.session.post(
-            f"{self.base_url}/api/hub_info",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token
-                }
-        ) as resp:
-            info = await resp.json()
-        if info.get("message") == "User is not authorized":
-            _LOGGER.warning("User not authorized in hub_info body, refreshing token...")
-            await self.update_refresh_token()
-    
-            async with self.session.post(
-                 f"{self.base_url}/api/hub_info",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token
-                }
-            ) as resp:
-                info = await resp.json()
-        if "state" not in info:
-            _LOGGER.error("No 'state' in hub info response: %s", info)
+        info = await self._request("get_hub_info", "/api/hub_info", {"hub_id": hub_id})
+        if not info or "state" not in info:
+            _LOGGER.warning("No 'state' in hub %s info response", hub_id)
+            trace("hub_info_without_state", hub_id=hub_id, response=info)
             return None
-        _LOGGER.error("API get hub info_time: %.2f sec", time.perf_counter() - start)
-        _LOGGER.error(f"API get hub info: {info["state"]}")
+        trace("hub_info", hub_id=hub_id, state=info["state"])
         return info
 
-    @handle_unauthorized
+    async def _send_arming_command(self, hub_id, command):
+        return await self._request(
+            "arming",
+            "/api/hub/arming",
+            {"hub_id": hub_id, "command": command},
+            idempotent=False,
+        )
+
+    @invalidates_hub
     async def arm_hub(self, hub_id): #can use arm state via argument
-        await self.ensure_token_valid()
-        async with self.session.post(
-                f"{self.base_url}/api/hub/arming",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token,
-                    "command": "ARM"
-                }
-        ) as resp:
-            if resp.status == 204 or resp.status == 200:
-                _LOGGER.error("Command sent successfully, no content returned.")
-                return None
-            else:
-                result = await resp.json()
-        _LOGGER.info("Arm hub result: %s", result)
+        result = await self._send_arming_command(hub_id, "ARM")
+        _LOGGER.debug("Arm hub result: %s", result)
         return result
 
-    @handle_unauthorized
+    @invalidates_hub
     async def disarm_hub(self, hub_id):
-        await self.ensure_token_valid()
-        async with self.session.post(
-                f"{self.base_url}/api/hub/arming",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token,
-                    "command":"DISARM"
-                }
-        ) as resp:
-            if resp.status == 204 or resp.status == 200:
-                _LOGGER.error("Command sent successfully, no content returned.")
-                return None
-            else:
-                result = await resp.json()
-        _LOGGER.info("Disarm hub result: %s", result)
+        result = await self._send_arming_command(hub_id, "DISARM")
+        _LOGGER.debug("Disarm hub result: %s", result)
         return result
 
-    @handle_unauthorized
+    @invalidates_hub
     async def arm_hub_night(self, hub_id):
-        await self.ensure_token_valid()
-        async with self.session.post(
-                f"{self.base_url}/api/hub/arming",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token,
-                    "command": "NIGHT_MODE_ON"
-                }
-        ) as resp:
-            if resp.status == 204 or resp.status == 200:
-                _LOGGER.error("Night mode command sent successfully, no content returned.")
-                return None
-            else:
-                result = await resp.json()
-        _LOGGER.info("Arm hub night result: %s", result)
+        result = await self._send_arming_command(hub_id, "NIGHT_MODE_ON")
+        _LOGGER.debug("Arm hub night result: %s", result)
         return result
 
-    @handle_unauthorized
+    @cached
+    @single_flight
     async def get_hub_devices(self, hub_id):
-        await self.ensure_token_valid()
-        async with (self.session.post(
-                f"{self.base_url}/api/hub_devices",
-                json ={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "session_token": self.session_token
-                })
-        as resp):
-            if resp.status == 204:
-                _LOGGER.info("No content returned for devices.")
-                return None
-            else:
-                result = await resp.json()
-        return result
-
-   
-            
+        return await self._request("get_hub_devices", "/api/hub_devices", {"hub_id": hub_id})
 
-    @handle_unauthorized
+    @cached
+    @single_flight
     async def get_device_info(self, hub_id, device_id):
-        start = time.perf_counter()
-        await self.ensure_token_valid()
-        async with self.session.post(
+        return await self._request(
+            "get_device_info",
+            "/api/device_info",
+            {"hub_id": hub_id, "device_id": device_id},
+        )
 
-                f"{self.base_url}/api/device_info",
-                json={
-                    "user_id": self.user_id,
-                    "hub_id": hub_id,
-                    "device_id": device_id,
-                    "session_token": self.session_token
-                }
-        ) as resp:
-            hit = resp.headers.get("X-Ajax-Origin-Hit")
-            _LOGGER.error("ajax origin hit=%s", hit)
-            if resp.status == 204:
-                _LOGGER.info("No content returned for device info.")
-                return None
-            else:
-                result = await resp.json()
-        _LOGGER.error("API get DEVICE info_time: %.2f sec", time.perf_counter() - start)
-        return result
 
+def _is_unauthorized(data):
+    return isinstance(data, dict) and data.get("message") == "User is not authorized"
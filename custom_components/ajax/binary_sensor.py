@@ -1,217 +1,136 @@
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from .const import DOMAIN
-from .device_mapper import map_ajax_device
-from .api import AjaxAPI
+from .entity import AjaxDeviceEntity, async_setup_device_platform
+from .device_mapper import device_entities
 import logging
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    devices_by_hub = hass.data[DOMAIN][entry.entry_id]["devices_by_hub"]
-    entities = []
-    data = hass.data[DOMAIN][entry.entry_id]
-    api = hass.data[DOMAIN][entry.entry_id]["api"]
-
-    for hub_id, devices in devices_by_hub.items():
-        for device in devices:
-            for platform, meta in map_ajax_device(device):
-                if platform != "binary_sensor":
-                    continue
-                if meta.get("device_class") == "smoke":
-                    entity = FireProtectBinarySensor(device, meta, hub_id, api)
-                elif meta.get("device_class") == "opening":
-                    entity = DoorProtectBinarySensor(device, meta, hub_id, api)
-                elif meta.get("device_class") == "motion":
-                    entity = MotionProtectBinarySensor(device, meta, hub_id, api)
-                else:
-                    entity = AjaxBinarySensor(device, meta, hub_id, api)
-                entities.append(entity)
-
-    async_add_entities(entities)
-
-
-
-class AjaxBinarySensor(BinarySensorEntity):
-    def __init__(self, device, meta, hub_id, api):
-        self.api = api
+    async_setup_device_platform(hass, entry, "binary_sensor", async_add_entities, _create_entities)
+
+
+def _create_entities(coordinator, hub_id, device):
+    for meta in device_entities(device, "binary_sensor"):
+        if meta.get("device_class") == "smoke":
+            yield FireProtectBinarySensor(coordinator, device, meta, hub_id)
+        elif meta.get("device_class") == "opening":
+            yield DoorProtectBinarySensor(coordinator, device, meta, hub_id)
+        elif meta.get("device_class") == "motion":
+            yield MotionProtectBinarySensor(coordinator, device, meta, hub_id)
+        else:
+            yield AjaxBinarySensor(coordinator, device, meta, hub_id)
+
+
+
+class AjaxBinarySensor(AjaxDeviceEntity, BinarySensorEntity):
+    def __init__(self, coordinator, device, meta, hub_id):
+        super().__init__(coordinator, device)
         self._meta = meta
         self.hub_id = hub_id
-        self._device = device
         self._attr_name = device.get("deviceName") + f" ({device.get('id')})"
         self._attr_unique_id = f"ajax_{device.get('id')}_{meta.get('device_class')}"
         self._attr_device_class = meta.get("device_class")
-        self._alarm_detected = None
-        self._name_from_api = self._device.get("deviceName", "DoorProtectROTTO") # valore di fallback
-        self._model_version = self._device.get("deviceType", "DoorProtectTIPO")
-        self._firmware_version = device.get("firmwareVersion", "0")
-        self._serial_number = device.get("id", "0")
-        # self._battery = None
-        
 
     @property
     def is_on(self):
-        return self._alarm_detected
-
-    async def async_update(self):
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        # self._battery = device_info.get('batteryChargeLevelPercentage')
-        # Salva i campi che ti interessano
-        self._name_from_api = device_info.get('deviceName')
-        #self._model_version = device_info.get('deviceType')
-        self._temperature = device_info.get('temperature')
-        self._firmware_version = device_info.get('firmwareVersion')
-        #self._serial_number = device_info.get('id')
-    
+        return None
+
     @property
     def device_info(self):
+        state = self.device_state
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "via_device": (DOMAIN, f"ajax_hub_{self.hub_id}"),  # <–– qui!
-            "name": self._name_from_api,
+            "name": state.name,
             "manufacturer": "Ajax",
-            "model": self._model_version,
-            "sw_version": self._firmware_version,
-            "serial_number": self._serial_number,
+            "model": state.device_type or "DoorProtectTIPO",
+            "sw_version": state.firmware_version,
+            "serial_number": self._device_id or "0",
         }
 
     # @property
     # def extra_state_attributes(self):
     #     return {
-    #         "battery_level": self._battery,
+    #         "battery_level": self.device_state.battery,
     #     }
       
 
 
 class FireProtectBinarySensor(AjaxBinarySensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._smoke_alarm = None
-        self._temperature_alarm = None
-        self._co_alarm = None
-        self._htemp_diff_alarm = None
-
+    _state_fields = ("co_alarm", "smoke_alarm", "temperature_alarm", "temperature_rise_alarm")
 
     @property
     def is_on(self):
-        return self._alarm_detected
-
-    async def async_update(self):
-        await super().async_update()
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._co_alarm = device_info.get('coAlarmDetected')
-        self._smoke_alarm = device_info.get('smokeAlarmDetected')
-        self._temperature_alarm  = device_info.get('temperatureAlarmDetected')
-        self._htemp_diff_alarm  = device_info.get('highTemperatureDiffDetected')
-        self._alarm_detected = any([
-            self._co_alarm,
-            self._smoke_alarm,
-            self._temperature_alarm,
-            self._htemp_diff_alarm
+        state = self.device_state
+        return any([
+            state.co_alarm,
+            state.smoke_alarm,
+            state.temperature_alarm,
+            state.temperature_rise_alarm,
         ])
-        
-
 
     @property
     def extra_state_attributes(self):
-        # attrs = super().extra_state_attributes.copy()
-        # attrs.update({
-        #     "smoke_alarm": self._smoke_alarm,
-        #     "temperature_alarm": self._temperature_alarm,
-        #     "temperature_rise_alarm": self._htemp_diff_alarm,
-        #     "high_co": self._co_alarm
-        # })
-        # return attrs
+        state = self.device_state
         return {
-            "smoke_alarm": self._smoke_alarm,
-            "temperature_alarm": self._temperature_alarm,
-            "temperature_rise_alarm": self._htemp_diff_alarm,
-            "high_co": self._co_alarm
+            "smoke_alarm": state.smoke_alarm,
+            "temperature_alarm": state.temperature_alarm,
+            "temperature_rise_alarm": state.temperature_rise_alarm,
+            "high_co": state.co_alarm
         }
 
-
-
-    
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "name": "Ajax FireProtectPlus",
             "manufacturer": "Ajax",
             "model": "FireProtectPlus",
         }
 
 class DoorProtectBinarySensor(AjaxBinarySensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._reed_closed = None
-        self._extra_contact_alarm = None
-        
-
+    _state_fields = ("reed_closed", "extra_contact_closed")
 
     @property
     def is_on(self):
-        return self._alarm_detected
-
-    async def async_update(self):
-        await super().async_update()
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._reed_closed = device_info.get('reedClosed')
-        self._extra_contact_alarm = device_info.get('extraContactClosed')
-        self._alarm_detected = (self._reed_closed is False or self._extra_contact_alarm is True)
-
+        state = self.device_state
+        return state.reed_closed is False or state.extra_contact_closed is True
 
     @property
     def extra_state_attributes(self):
-        # attrs = super().extra_state_attributes.copy()
-        # attrs.update({
-        #     "reed_closed": self._reed_closed,
-        #     "extra_contact_alarm": self._extra_contact_alarm,
-        # })
-        # return attrs
+        state = self.device_state
         return {
-            "reed_closed": self._reed_closed,
-            "extra_contact_alarm": self._extra_contact_alarm,
+            "reed_closed": state.reed_closed,
+            "extra_contact_alarm": state.extra_contact_closed,
         }
 
-
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "name": "Ajax DoorProtect",
             "manufacturer": "Ajax",
             "model": "DoorProtect",
         }
 
 class MotionProtectBinarySensor(AjaxBinarySensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._sensor_state = None
-        
-
+    _state_fields = ("state", "motion_detected")
 
     @property
     def is_on(self):
-        return False
-
-    async def async_update(self):
-        await super().async_update()
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get("id"))
-        self._sensor_state = device_info.get("state")
-    
-
+        # Motion is only reported on the event stream, polling never sees it
+        return bool(self.device_state.motion_detected)
 
     @property
     def extra_state_attributes(self):
         return {
-            "raw_state": self._sensor_state
-    }
-    
-
+            "raw_state": self.device_state.state
+        }
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "name": "Ajax MotionProtect",
             "manufacturer": "Ajax",
             "model": "MotionProtect",
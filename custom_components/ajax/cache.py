@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Bounded LRU cache for Ajax read endpoints with a TTL per endpoint.
+
+    Keys are ``(endpoint, hub_id, *ids)`` tuples, so everything belonging to a
+    hub can be dropped at once after a command was sent to it. Each hub has a
+    generation counter: a response fetched before an invalidation is not
+    stored, so an in-flight read can't put stale state back into the cache.
+    """
+
+    def __init__(self, ttls, max_entries):
+        self.ttls = dict(ttls)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self.hits = {}
+        self.misses = {}
+
+    def generation(self, hub_id):
+        return self._generations.get(hub_id, 0)
+
+    def get(self, key):
+        endpoint = key[0]
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            if time.monotonic() - stored_at < self.ttls.get(endpoint, 0):
+                self._entries.move_to_end(key)
+                self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+                return value
+            del self._entries[key]
+        self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+        return None
+
+    def set(self, key, value, generation):
+        if self.ttls.get(key[0], 0) <= 0 or generation != self.generation(key[1]):
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_hub(self, hub_id):
+        self._generations[hub_id] = self.generation(hub_id) + 1
+        for key in [key for key in self._entries if key[1] == hub_id]:
+            del self._entries[key]
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def entries(self):
+        """Yield ``(key, age, ttl, value)`` for every stored response, oldest first."""
+        now = time.monotonic()
+        for key, (stored_at, value) in self._entries.items():
+            yield key, now - stored_at, self.ttls.get(key[0], 0), value
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "endpoints": {
+                endpoint: {
+                    "ttl": self.ttls.get(endpoint, 0),
+                    "hits": self.hits.get(endpoint, 0),
+                    "misses": self.misses.get(endpoint, 0),
+                }
+                for endpoint in sorted(set(self.ttls) | set(self.hits) | set(self.misses))
+            },
+        }
@@ -1,13 +1,15 @@
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import voluptuous as vol
 import aiohttp
 import logging
 import time
 from typing import Any
 
-from .const import DOMAIN, DEFAULT_API_URL
+from .const import DOMAIN, DEFAULT_API_URL, REQUEST_TIMEOUTS
+from .integration_startup import async_apply_tokens
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,16 +27,17 @@ class AjaxConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             platforms = self.reauth_entry.data["platforms"]
         if user_input is not None:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{DEFAULT_API_URL}/api/login",
-                        json={
-                            "login": user_input["login"],
-                            "passwordHash": user_input["password"]
-                        }
-                        # headers={"X-Api-Key": user_input["api_key"]},
-                    ) as resp:
-                        data = await resp.json()
+                session = async_get_clientsession(self.hass)
+                async with session.post(
+                    f"{DEFAULT_API_URL}/api/login",
+                    json={
+                        "login": user_input["login"],
+                        "passwordHash": user_input["password"]
+                    },
+                    # headers={"X-Api-Key": user_input["api_key"]},
+                    timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUTS["login"]),
+                ) as resp:
+                    data = await resp.json()
 
                 if resp.status != 200 or "sessionToken" not in data:
                     return self.async_show_form(
@@ -54,34 +57,28 @@ class AjaxConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
                 # If this is a reauth flow, update existing entry
                 if self.reauth_entry:
-                    self.hass.config_entries.async_update_entry(
-                        self.reauth_entry, data=new_data
-                    )
-                    # Reset reauth flag in API instance if it exists
-                    domain_data = self.hass.data.get("ajax", {}).get(self.reauth_entry.entry_id, {})
-                    api = domain_data.get("api")
-                    if api and hasattr(api, '_reauth_in_progress'):
-                        api._reauth_in_progress = False
-
-                    # Trigger reload to re-run async_setup_entry
-                    # await self.hass.config_entries.async_reload(self.reauth_entry.entry_id)
-                    self.hass.config_entries.async_update_entry(self.reauth_entry, data=new_data)
-
-                    unloaded = await self.hass.config_entries.async_unload(self.reauth_entry.entry_id)
-                    if not unloaded:
-                        _LOGGER.error("Failed to unload entry during reauth")
-                        return self.async_abort(reason="reauth_failed")
-
-                    setup_ok = await self.hass.config_entries.async_setup(self.reauth_entry.entry_id)
-                    if not setup_ok:
+                    entry = self.reauth_entry
+                    same_account = entry.data.get("user_id") == new_data["user_id"]
+                    self.hass.config_entries.async_update_entry(entry, data=new_data)
+
+                    if same_account and entry.state is config_entries.ConfigEntryState.LOADED:
+                        # Swap the tokens in place, entities and polling carry on
+                        async_apply_tokens(
+                            self.hass,
+                            entry,
+                            new_data["session_token"],
+                            new_data["refresh_token"],
+                            new_data["token_created_at"],
+                        )
+                        return self.async_abort(reason="reauth_successful")
+
+                    # Another account, or setup never got through: start over
+                    if not await self.hass.config_entries.async_reload(entry.entry_id):
                         _LOGGER.error("Failed to setup entry during reauth")
                         return self.async_abort(reason="reauth_failed")
 
                     return self.async_abort(reason="reauth_successful")
 
-                    # Don't force reload, let Home Assistant handle it naturally
-                    return self.async_abort(reason="reauth_successful")
-
                 # Otherwise create new entry
                 return self.async_create_entry(
                     title="Ajax Alarm",
@@ -103,7 +100,7 @@ class AjaxConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_reauth(self, entry_data: dict[str, Any]) -> FlowResult:
         """Perform reauth upon an API authentication error."""
-        _LOGGER.error("reauth CALLED")
+        _LOGGER.debug("Reauth started")
         self.reauth_entry = self.hass.config_entries.async_get_entry(
             self.context["entry_id"]
         )
@@ -1,3 +1,79 @@
+from datetime import timedelta
+
 DOMAIN = "ajax"
 
 DEFAULT_API_URL = "https://lbe-ajax-prod-oc1-milan-01.pgsa.cloud"
+
+# Read cache: seconds a response stays valid per endpoint, and max entries kept.
+# device_info carries the live device state next to firmware, name and type, so
+# its TTL stays below POLL_INTERVAL_FAST: every poll reads it from the cloud, and
+# the cache only coalesces the reads of setup, discovery and entity updates.
+DEFAULT_CACHE_TTLS = {
+    "get_hub_info": 5,
+    "get_hub_devices": 300,
+    "get_device_info": 10,
+}
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+
+# Max number of API requests in flight while enumerating hubs and devices at setup
+CONF_SETUP_CONCURRENCY = "setup_concurrency"
+DEFAULT_SETUP_CONCURRENCY = 8
+
+# Session token lifetime, and how long before expiry it is refreshed in the background
+SESSION_TOKEN_LIFETIME = 14 * 60
+TOKEN_REFRESH_MARGIN = 60
+TOKEN_REFRESH_RETRY = 30
+
+# Total timeout per API operation (seconds); commands are kept short to fail fast
+REQUEST_TIMEOUTS = {
+    "login": 10,
+    "refresh": 10,
+    "get_hubs": 15,
+    "get_hub_info": 8,
+    "get_hub_devices": 15,
+    "get_device_info": 10,
+    "arming": 5,
+    "events": 10,  # connecting only, the stream itself stays open
+}
+# Retries of idempotent reads on network errors, timeouts and 5xx, with
+# exponential backoff between RETRY_BACKOFF_BASE and RETRY_BACKOFF_MAX seconds
+READ_RETRIES = 2
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 5
+
+# Adaptive polling: fast while a hub is armed, alarmed or busy, slow when disarmed and quiet
+POLL_INTERVAL_FAST = timedelta(seconds=15)
+POLL_INTERVAL_SLOW = timedelta(seconds=120)
+# How long to keep polling fast after a command, or after a device changed (seconds)
+COMMAND_FAST_POLL_WINDOW = 60
+ACTIVITY_FAST_POLL_WINDOW = 300
+
+# After an arming command, poll the hub this often (seconds) until it reports
+# the new state, for at most COMMAND_CONFIRM_TIMEOUT seconds
+COMMAND_CONFIRM_INTERVAL = 0.5
+COMMAND_CONFIRM_TIMEOUT = 15
+
+# Poll cycles per hub kept, with their request timings, for the diagnostics download
+POLL_HISTORY_SIZE = 20
+
+# Account-wide request rate limit (requests/second, burst size); polls leave the
+# last RATE_LIMIT_COMMAND_RESERVE tokens to arm/disarm commands
+RATE_LIMIT_RATE = 20
+RATE_LIMIT_BURST = 40
+RATE_LIMIT_COMMAND_RESERVE = 4
+
+# Event stream from the proxy: reconnect backoff bounds (seconds), read timeout
+# (the proxy sends heartbeats more often), and the safety-net poll interval
+# used while the stream is connected
+EVENT_STREAM_RETRY_MIN = 1
+EVENT_STREAM_RETRY_MAX = 300
+EVENT_STREAM_READ_TIMEOUT = 60
+POLL_INTERVAL_PUSH = timedelta(minutes=10)
+
+# How often the device list of every hub is compared with the known devices
+DISCOVERY_INTERVAL = timedelta(minutes=30)
+
+# Backoff bounds (seconds) for retrying a hub whose devices couldn't all be
+# fetched during setup
+HUB_SETUP_RETRY_MIN = 30
+HUB_SETUP_RETRY_MAX = 900
@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .device_state import AjaxDeviceState, changed_fields
+from .trace import trace
+from .const import (
+    DOMAIN,
+    POLL_INTERVAL_FAST,
+    POLL_INTERVAL_SLOW,
+    COMMAND_FAST_POLL_WINDOW,
+    COMMAND_CONFIRM_INTERVAL,
+    COMMAND_CONFIRM_TIMEOUT,
+    ACTIVITY_FAST_POLL_WINDOW,
+    POLL_HISTORY_SIZE,
+    POLL_INTERVAL_PUSH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Device state attributes that indicate something is going on at the premises
+ACTIVITY_FIELDS = (
+    "state",
+    "reed_closed",
+    "extra_contact_closed",
+    "smoke_alarm",
+    "co_alarm",
+    "temperature_alarm",
+    "temperature_rise_alarm",
+    "motion_detected",
+)
+ALARM_FLAGS = (
+    "smoke_alarm",
+    "co_alarm",
+    "temperature_alarm",
+    "temperature_rise_alarm",
+    "extra_contact_closed",
+)
+
+
+class AjaxHubCoordinator(DataUpdateCoordinator):
+    """Fetches the hub state and every device of one hub once per cycle.
+
+    ``data`` maps device id -> latest AjaxDeviceState and is shared by all
+    entities of the hub, whatever platform they belong to; ``hub_info``
+    holds the latest ``hub_info`` payload for the alarm panel.
+    ``changed_fields`` (device state attributes) and ``hub_changed_fields``
+    (hub_info fields) tell what changed in the last update, so entities can skip writing unchanged state.
+    ``poll_history`` keeps the last cycles with the time every request took.
+
+    The polling interval adapts to what is happening: fast while the hub is
+    armed, a device reports an alarm, a command was just sent or a device
+    changed recently, slow when everything is disarmed and quiet. While the
+    event stream is connected, changes arrive through ``async_apply_*_delta``
+    and polling is only a slow safety net.
+    """
+
+    def __init__(self, hass, entry, api, hub_id, devices):
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name=f"{DOMAIN}_hub_{hub_id}",
+            update_interval=POLL_INTERVAL_FAST,
+        )
+        self.api = api
+        self.hub_id = hub_id
+        self.device_ids = [device["id"] for device in devices]
+        self.hub_info = None
+        self.hub_changed_fields = frozenset()
+        self.changed_fields = {}
+        self._fast_until = 0
+        self.poll_history = deque(maxlen=POLL_HISTORY_SIZE)
+        self.push_connected = False
+        # Seed with the payloads fetched during setup, so entities have
+        # state right away and the first poll happens one interval later.
+        self.data = {device["id"]: AjaxDeviceState(device) for device in devices}
+
+    def note_command(self):
+        """Poll fast for a while after a command was sent to the hub."""
+        self._fast_until = max(self._fast_until, time.monotonic() + COMMAND_FAST_POLL_WINDOW)
+        self.update_interval = POLL_INTERVAL_FAST
+
+    async def async_confirm_hub_state(self, confirmed, timeout=COMMAND_CONFIRM_TIMEOUT):
+        """Poll the hub state until ``confirmed(state)`` holds or ``timeout`` passes.
+
+        Used right after a command instead of sleeping a fixed time; returns
+        whether the expected state was seen.
+        """
+        deadline = time.monotonic() + timeout
+        # Only the hub state is refreshed here
+        self.changed_fields = {}
+        before = self.hub_info
+        while True:
+            try:
+                hub_info = await self.api.get_hub_info(self.hub_id, fresh=True)
+            except ConfigEntryAuthFailed:
+                raise
+            except Exception as e:
+                _LOGGER.warning("Hub %s state check failed: %s", self.hub_id, e)
+                hub_info = None
+            if hub_info:
+                self.hub_info = hub_info
+                if confirmed(hub_info["state"]):
+                    break
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(COMMAND_CONFIRM_INTERVAL)
+        self.hub_changed_fields = _changed_fields(before, self.hub_info)
+        self.async_update_listeners()
+        return bool(hub_info) and confirmed(hub_info["state"])
+
+    async def _async_update_data(self):
+        cycle = {"started_at": dt_util.utcnow().isoformat(), "requests": {}}
+        self.poll_history.append(cycle)
+        start = time.monotonic()
+        token_wait = self.api.metrics.token_wait_seconds
+        try:
+            data, failures = await self._async_poll(cycle["requests"])
+        except Exception as e:
+            cycle["error"] = repr(e)
+            raise
+        finally:
+            cycle["duration"] = round(time.monotonic() - start, 4)
+            # Account-wide, so it includes waits of other hubs polling meanwhile
+            cycle["token_wait"] = round(self.api.metrics.token_wait_seconds - token_wait, 4)
+        cycle["failures"] = failures
+        cycle["next_interval"] = self.update_interval.total_seconds()
+        trace("poll_cycle", hub_id=self.hub_id, **cycle)
+        return data
+
+    async def _async_poll(self, timings):
+        # Nothing counts as changed if this update fails
+        self.changed_fields = {}
+        self.hub_changed_fields = frozenset()
+        previous = self.data or {}
+        hub_info, *results = await asyncio.gather(
+            _timed(timings, "hub_info", self.api.get_hub_info(self.hub_id)),
+            *(
+                _timed(timings, device_id, self.api.get_device_info(self.hub_id, device_id))
+                for device_id in self.device_ids
+            ),
+            return_exceptions=True,
+        )
+        if isinstance(hub_info, ConfigEntryAuthFailed):
+            raise hub_info
+        if isinstance(hub_info, BaseException):
+            _LOGGER.warning("Hub %s update failed: %s", self.hub_id, hub_info)
+            hub_info = None
+        if hub_info:
+            self._set_hub_info(hub_info)
+
+        data = {}
+        failures = 0
+        for device_id, result in zip(self.device_ids, results):
+            if isinstance(result, ConfigEntryAuthFailed):
+                raise result
+            if isinstance(result, BaseException) or not result:
+                failures += 1
+                if isinstance(result, BaseException):
+                    _LOGGER.warning("Device %s update failed: %s", device_id, result)
+                # Keep the last known payload for this device
+                if device_id in previous:
+                    data[device_id] = previous[device_id]
+                continue
+            state = AjaxDeviceState(result)
+            # Keep the old record when nothing changed, entities compare by identity first
+            data[device_id] = previous[device_id] if previous.get(device_id) == state else state
+
+        if not hub_info and failures == len(self.device_ids):
+            raise UpdateFailed(f"Hub {self.hub_id} and its devices could not be updated")
+
+        if any(
+            _activity(previous.get(device_id)) != _activity(device)
+            for device_id, device in data.items()
+        ):
+            self._fast_until = max(self._fast_until, time.monotonic() + ACTIVITY_FAST_POLL_WINDOW)
+        self.update_interval = self._next_interval(data)
+        self._track_changes(previous, data)
+        return data, failures
+
+    @callback
+    def async_add_devices(self, devices):
+        """Start tracking newly discovered devices, from their ``device_info``."""
+        known = set(self.device_ids)
+        self.device_ids.extend(device["id"] for device in devices if device["id"] not in known)
+        self.async_set_device_payloads(devices)
+
+    @callback
+    def async_remove_devices(self, device_ids):
+        """Stop tracking devices that were removed from the hub."""
+        removed = set(device_ids)
+        self.device_ids = [device_id for device_id in self.device_ids if device_id not in removed]
+        for device_id in removed:
+            self.api.cache.discard(("get_device_info", self.hub_id, device_id))
+        self.async_set_updated_data(
+            {device_id: state for device_id, state in self.data.items() if device_id not in removed}
+        )
+
+    @callback
+    def async_set_push_connected(self, connected):
+        """Switch between stream updates with a safety-net poll, and polling."""
+        if connected == self.push_connected:
+            return
+        self.push_connected = connected
+        if connected:
+            self.update_interval = POLL_INTERVAL_PUSH
+        else:
+            # Changes sent while the stream was down are lost, poll now
+            self.update_interval = self._next_interval(self.data or {})
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def async_apply_device_delta(self, device_id, fields):
+        """Apply changed ``device_info`` fields pushed by the event stream."""
+        old = (self.data or {}).get(device_id)
+        if old is None:
+            return
+        state = AjaxDeviceState({**old.as_payload(), **fields})
+        if state == old:
+            return
+        self.api.cache.discard(("get_device_info", self.hub_id, device_id))
+        if _activity(old) != _activity(state):
+            self._fast_until = max(self._fast_until, time.monotonic() + ACTIVITY_FAST_POLL_WINDOW)
+        self.async_set_updated_data({**self.data, device_id: state})
+
+    @callback
+    def async_apply_hub_delta(self, fields):
+        """Apply changed ``hub_info`` fields pushed by the event stream."""
+        if self.hub_info is None:
+            # Nothing to apply a partial update to yet
+            self.hass.async_create_task(self.async_request_refresh())
+            return
+        self.api.cache.discard(("get_hub_info", self.hub_id))
+        self.changed_fields = {}
+        self._set_hub_info({**self.hub_info, **fields})
+        if self.hub_changed_fields:
+            self.async_update_listeners()
+
+    def _next_interval(self, data):
+        if self.push_connected:
+            return POLL_INTERVAL_PUSH
+        return POLL_INTERVAL_FAST if self._needs_fast_poll(data) else POLL_INTERVAL_SLOW
+
+    @callback
+    def async_set_device_payloads(self, devices):
+        """Push fresh ``device_info`` payloads fetched outside a poll."""
+        self.async_set_updated_data(
+            {**self.data, **{device["id"]: AjaxDeviceState(device) for device in devices}}
+        )
+
+    @callback
+    def async_set_updated_data(self, data):
+        self._track_changes(self.data or {}, data)
+        self.hub_changed_fields = frozenset()
+        super().async_set_updated_data(data)
+
+    def _set_hub_info(self, hub_info):
+        self.hub_changed_fields = _changed_fields(self.hub_info, hub_info)
+        self.hub_info = hub_info
+
+    def _track_changes(self, previous, data):
+        self.changed_fields = {
+            device_id: changed_fields(previous.get(device_id), device)
+            for device_id, device in data.items()
+        }
+
+    def _needs_fast_poll(self, data):
+        if time.monotonic() < self._fast_until:
+            return True
+        state = (self.hub_info or {}).get("state")
+        if state and not state.startswith("DISARMED"):
+            return True
+        return any(_alerting(device) for device in data.values())
+
+
+async def _timed(timings, name, request):
+    start = time.monotonic()
+    try:
+        return await request
+    finally:
+        timings[name] = round(time.monotonic() - start, 4)
+
+
+def _changed_fields(old, new):
+    if old is new:
+        return frozenset()
+    if not old:
+        return frozenset(new)
+    return frozenset(
+        field for field in old.keys() | new.keys() if old.get(field) != new.get(field)
+    )
+
+
+def _alerting(device):
+    """Whether a device is open or reports an alarm."""
+    return device is not None and (
+        device.reed_closed is False or any(getattr(device, flag) for flag in ALARM_FLAGS)
+    )
+
+
+def _activity(device):
+    if not device:
+        return None
+    return tuple(getattr(device, field) for field in ACTIVITY_FIELDS)
@@ -1,73 +1,139 @@
-def map_ajax_device(device: dict) -> list[tuple[str, dict]]:
+from types import MappingProxyType
+
+# Which Home Assistant entities each Ajax product gets: (deviceTypes, entities),
+# each entity being (platform, {device_class, unit, ...}). Supporting a new
+# product only needs a row here.
+AJAX_PRODUCTS = (
+    (
+        ("motionprotect", "motionprotectplus", "motionprotectoutdoor", "motionprotectcurtain"),
+        (
+            ("binary_sensor", {"device_class": "motion"}),
+            ("sensor", {"device_class": "motion_temperature", "unit": "°C"}),
+        ),
+    ),
+    (
+        ("doorprotect", "doorprotectplus"),
+        (
+            #("binary_sensor", {"device_class": "opening"}),
+            ("sensor", {"device_class": "door_temperature", "unit": "°C"}),
+        ),
+    ),
+    (
+        ("glassprotect",),
+        (("binary_sensor", {"device_class": "sound"}),),
+    ),
+    (
+        ("combiprotect",),
+        (
+            ("binary_sensor", {"device_class": "motion"}),
+            ("binary_sensor", {"device_class": "sound"}),
+        ),
+    ),
+    (
+        ("fireprotect", "fireprotectplus", "fireprotect2"),
+        (
+            ("binary_sensor", {"device_class": "smoke"}),
+            ("sensor", {"device_class": "temperature", "unit": "°C"}),
+            #("sensor", {"device_class": "carbon_monoxide", "unit": "ppm"}),
+        ),
+    ),
+    (
+        ("leaksprotect",),
+        (("binary_sensor", {"device_class": "moisture"}),),
+    ),
+    (
+        ("homesiren", "streetsiren"),
+        (("binary_sensor", {}),),
+    ),
+    # (("lifelinebutton", "button"), (("button", {"device_class": "restart"}),)),
+    # (("doublebutton",), (("button", {"device_class": "update"}),)),
+    (
+        ("spacecontrol",),
+        (("event", {"event_type": "ajax_remote"}),),
+    ),
+    (
+        ("keypad", "keypadplus"),
+        (("event", {"event_type": "ajax_keypad"}),),
+    ),
+    (
+        ("wallswitch", "socket", "relay"),
+        (
+            ("switch", {}),
+            ("sensor", {"device_class": "power", "unit": "W"}),
+            ("sensor", {"device_class": "energy", "unit": "kWh"}),
+        ),
+    ),
+    (
+        ("powersupply",),
+        (("sensor", {"device_class": "voltage", "unit": "V"}),),
+    ),
+    (
+        ("rex", "rex2"),
+        (("binary_sensor", {"device_class": "connectivity"}),),
+    ),
+    (
+        ("lifequality",),
+        (
+            ("sensor", {"device_class": "temperature", "unit": "°C"}),
+            ("sensor", {"device_class": "humidity", "unit": "%"}),
+            ("sensor", {"device_class": "carbon_dioxide", "unit": "ppm"}),
+        ),
+    ),
+    (
+        ("transmitter", "multitransmitter"),
+        (("binary_sensor", {"device_class": "generic"}),),
+    ),
+    (
+        ("hub", "ajaxhub"),
+        (("alarm_control_panel", {}),),
+    ),
+)
+
+
+def _build_index(products):
+    """Index the product table by lower-case deviceType, with read-only entries.
+
+    Every type maps to its (platform, meta) tuple, and to the metas grouped by
+    platform, so lookups never rebuild anything.
     """
-    Maps an Ajax device to Home Assistant platforms.
-    
-    Returns:
-        List of tuples: (platform, {device_class, unit, ...})
-    """
-    device_type = device.get("deviceType", "").lower()
-    result = []
-
-    if device_type in [
-        "motionprotect", "motionprotectplus", "motionprotectoutdoor", "motionprotectcurtain"
-    ]:
-        result.append(("binary_sensor", {"device_class": "motion"}))
-        result.append(("sensor", {"device_class": "motion_temperature", "unit": "°C"}))
-
-    elif device_type in ["doorprotect", "doorprotectplus"]:
-        #result.append(("binary_sensor", {"device_class": "opening"}))
-        result.append(("sensor", {"device_class": "door_temperature", "unit": "°C"}))
-
-    elif device_type == "glassprotect":
-        result.append(("binary_sensor", {"device_class": "sound"}))
-
-    elif device_type == "combiprotect":
-        result.append(("binary_sensor", {"device_class": "motion"}))
-        result.append(("binary_sensor", {"device_class": "sound"}))
-
-    elif device_type in ["fireprotect", "fireprotectplus", "fireprotect2"]:
-        result.append(("binary_sensor", {"device_class": "smoke"}))
-        result.append(("sensor", {"device_class": "temperature", "unit": "°C"}))
-        #result.append(("sensor", {"device_class": "carbon_monoxide", "unit": "ppm"}))
+    entities = {}
+    by_platform = {}
+    for device_types, product_entities in products:
+        frozen = tuple((platform, MappingProxyType(dict(meta))) for platform, meta in product_entities)
+        grouped = {}
+        for platform, meta in frozen:
+            grouped.setdefault(platform, []).append(meta)
+        grouped = MappingProxyType({platform: tuple(metas) for platform, metas in grouped.items()})
+        for device_type in device_types:
+            entities[device_type] = frozen
+            by_platform[device_type] = grouped
+    return MappingProxyType(entities), MappingProxyType(by_platform)
 
-    elif device_type == "leaksprotect":
-        result.append(("binary_sensor", {"device_class": "moisture"}))
 
-    elif device_type in ["homesiren", "streetsiren"]:
-        result.append(("binary_sensor", {}))
+_ENTITIES_BY_TYPE, _ENTITIES_BY_TYPE_AND_PLATFORM = _build_index(AJAX_PRODUCTS)
+_NO_PLATFORMS = MappingProxyType({})
 
-    # elif device_type in ["lifelinebutton", "button"]:
-    #     result.append(("button", {"device_class": "restart"}))
-    #
-    # elif device_type == "doublebutton":
-    #     result.append(("button", {"device_class": "update"}))
 
-    elif device_type == "spacecontrol":
-        result.append(("event", {"event_type": "ajax_remote"}))
-
-    elif device_type in ["keypad", "keypadplus"]:
-        result.append(("event", {"event_type": "ajax_keypad"}))
-
-    elif device_type in ["wallswitch", "socket", "relay"]:
-        result.append(("switch", {}))
-        result.append(("sensor", {"device_class": "power", "unit": "W"}))
-        result.append(("sensor", {"device_class": "energy", "unit": "kWh"}))
-
-    elif device_type == "powersupply":
-        result.append(("sensor", {"device_class": "voltage", "unit": "V"}))
+def map_ajax_device(device: dict) -> tuple[tuple[str, MappingProxyType], ...]:
+    """
+    Maps an Ajax device to Home Assistant platforms.
 
-    elif device_type in ["rex", "rex2"]:
-        result.append(("binary_sensor", {"device_class": "connectivity"}))
+    Returns:
+        Tuple of (platform, {device_class, unit, ...}) pairs, shared by all
+        devices of the same type and read-only.
+    """
+    return _ENTITIES_BY_TYPE.get(device.get("deviceType", "").lower(), ())
 
-    elif device_type == "lifequality":
-        result.append(("sensor", {"device_class": "temperature", "unit": "°C"}))
-        result.append(("sensor", {"device_class": "humidity", "unit": "%"}))
-        result.append(("sensor", {"device_class": "carbon_dioxide", "unit": "ppm"}))
 
-    elif device_type in ["transmitter", "multitransmitter"]:
-        result.append(("binary_sensor", {"device_class": "generic"}))
+def device_entities(device: dict, platform: str) -> tuple[MappingProxyType, ...]:
+    """Metas of the entities a device gets on one platform."""
+    return _ENTITIES_BY_TYPE_AND_PLATFORM.get(
+        device.get("deviceType", "").lower(), _NO_PLATFORMS
+    ).get(platform, ())
 
-    elif device_type in ["hub", "ajaxhub"]:
-        result.append(("alarm_control_panel", {}))
 
-    return result
+def device_platforms(device: dict):
+    """Platforms a device has entities on."""
+    return _ENTITIES_BY_TYPE_AND_PLATFORM.get(
+        device.get("deviceType", "").lower(), _NO_PLATFORMS
+    ).keys()
@@ -0,0 +1,75 @@
+from types import MappingProxyType
+
+# device_info payload field -> AjaxDeviceState attribute; anything else in the
+# payload is dropped when it is parsed
+DEVICE_FIELDS = MappingProxyType(
+    {
+        "id": "id",
+        "deviceName": "name",
+        "deviceType": "device_type",
+        "firmwareVersion": "firmware_version",
+        "state": "state",
+        "batteryChargeLevelPercentage": "battery",
+        "temperature": "temperature",
+        "reedClosed": "reed_closed",
+        "extraContactClosed": "extra_contact_closed",
+        "smokeAlarmDetected": "smoke_alarm",
+        "coAlarmDetected": "co_alarm",
+        "temperatureAlarmDetected": "temperature_alarm",
+        "highTemperatureDiffDetected": "temperature_rise_alarm",
+        "motionDetected": "motion_detected",  # only sent on the event stream
+    }
+)
+
+# Kept of every device next to its state record: what its entities are created
+# and named from (see device_mapper)
+SUMMARY_FIELDS = ("id", "deviceType", "deviceName")
+
+
+class AjaxDeviceState:
+    """State of one device, parsed once from its ``device_info`` payload.
+
+    Holds only the fields the integration shows, and is shared by all the
+    entities of the device through their hub coordinator. Records are never
+    modified; every fetch that changes something makes a new one.
+    """
+
+    __slots__ = tuple(DEVICE_FIELDS.values())
+
+    def __init__(self, payload):
+        for field, attr in DEVICE_FIELDS.items():
+            setattr(self, attr, payload.get(field))
+
+    def __eq__(self, other):
+        if not isinstance(other, AjaxDeviceState):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"AjaxDeviceState({self.as_payload()!r})"
+
+    def as_payload(self):
+        """The record as a ``device_info``-like dict, e.g. for the snapshot."""
+        return {
+            field: getattr(self, attr)
+            for field, attr in DEVICE_FIELDS.items()
+            if getattr(self, attr) is not None
+        }
+
+
+def changed_fields(old, new):
+    """Names of the attributes that differ between two records of a device."""
+    if old is new:
+        return frozenset()
+    if old is None:
+        return frozenset(AjaxDeviceState.__slots__)
+    return frozenset(
+        attr for attr in AjaxDeviceState.__slots__ if getattr(old, attr) != getattr(new, attr)
+    )
+
+
+def device_summary(payload):
+    """The ``device_info`` fields a device's entities are created from."""
+    return {field: payload[field] for field in SUMMARY_FIELDS if field in payload}
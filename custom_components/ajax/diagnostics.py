@@ -0,0 +1,82 @@
+"""Diagnostics download for the Ajax integration.
+
+Shows where the time of a slow alarm panel went: the last poll cycles of every
+hub with the time each request took, token refresh waits, API latencies, the
+response cache and the current polling interval per hub.
+"""
+import time
+from collections import Counter
+
+from homeassistant.components.diagnostics import async_redact_data
+
+from .const import DOMAIN
+
+TO_REDACT = {
+    "session_token",
+    "refresh_token",
+    "sessionToken",
+    "refreshToken",
+    "user_id",
+    "userId",
+    "login",
+    "email",
+    "phone",
+    "password",
+    "latitude",
+    "longitude",
+    "address",
+}
+
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    data = hass.data[DOMAIN][entry.entry_id]
+    api = data["api"]
+    coordinators = data.get("coordinators", {})
+
+    per_hub = {}
+    for hub_id, devices in (data.get("devices_by_hub") or {}).items():
+        coordinator = coordinators.get(hub_id)
+        per_hub[hub_id] = {
+            "devices": len(devices),
+            "device_types": dict(Counter(device.get("deviceType") for device in devices)),
+        }
+        if coordinator is None:
+            continue
+        per_hub[hub_id].update(
+            {
+                "hub_info": coordinator.hub_info,
+                "update_interval": coordinator.update_interval.total_seconds(),
+                "fast_poll_remaining": max(0, round(coordinator._fast_until - time.monotonic(), 1)),
+                "last_update_success": coordinator.last_update_success,
+                "push_connected": coordinator.push_connected,
+                "poll_cycles": list(coordinator.poll_history),
+            }
+        )
+
+    return async_redact_data(
+        {
+            "entry": entry.data,
+            "hubs": data.get("hubs"),
+            "per_hub": per_hub,
+            "token": {
+                "age": round(time.time() - api.session_created_at, 1),
+                "waits": api.metrics.token_waits,
+                "wait_seconds": round(api.metrics.token_wait_seconds, 4),
+            },
+            "api": api.metrics.as_dict(),
+            "event_stream": data["event_stream"].as_dict() if data.get("event_stream") else None,
+            "cache": {
+                **api.cache.stats(),
+                "entries": [
+                    {
+                        "key": list(key),
+                        "age": round(age, 2),
+                        "ttl": ttl,
+                        "value": value,
+                    }
+                    for key, age, ttl, value in api.cache.entries()
+                ],
+            },
+        },
+        TO_REDACT,
+    )
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import random
+
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import async_track_time_interval
+
+from .api import AjaxAPIError
+from .const import (
+    CONF_SETUP_CONCURRENCY,
+    DEFAULT_SETUP_CONCURRENCY,
+    DISCOVERY_INTERVAL,
+    DOMAIN,
+    HUB_SETUP_RETRY_MAX,
+    HUB_SETUP_RETRY_MIN,
+)
+from .coordinator import AjaxHubCoordinator
+from .device_mapper import device_platforms
+from .device_state import device_summary
+from .snapshot import entry_snapshot_data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AjaxDeviceDiscovery:
+    """Keeps the hubs and devices of the entry in sync with the cloud, without reloading.
+
+    Every DISCOVERY_INTERVAL the device list of each hub (one ``get_hub_devices``
+    per hub) is compared with the devices its coordinator knows. New devices
+    get their ``device_info`` fetched and their entities added as each one
+    arrives, forwarding platforms that weren't loaded yet; removed devices are
+    dropped from the device registry together with their entities. Unchanged
+    devices cost no request. A new hub gets its coordinator and alarm panel
+    and is set up like at startup; a removed hub is dropped with its devices.
+
+    On a setup without snapshot every hub goes through ``async_setup_hub``,
+    its own background pipeline that retries with backoff until all its
+    devices are in, so a slow or failing hub doesn't hold up the others.
+    """
+
+    def __init__(self, hass, entry, api):
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        self._lock = asyncio.Lock()
+        # At most this many requests in flight for fetching devices
+        self._semaphore = asyncio.Semaphore(
+            entry.options.get(CONF_SETUP_CONCURRENCY, DEFAULT_SETUP_CONCURRENCY)
+        )
+        # hub_id -> task of the hubs still being set up
+        self._hub_setups = {}
+        # Hubs whose setup stopped on an auth failure, resumed after reauth
+        self._stalled_setups = set()
+
+    @callback
+    def async_start(self):
+        self.entry.async_on_unload(
+            async_track_time_interval(self.hass, self._async_sync_due, DISCOVERY_INTERVAL)
+        )
+
+    @callback
+    def _async_sync_due(self, _now):
+        self.entry.async_create_background_task(
+            self.hass, self.async_sync(), f"{DOMAIN}_discovery_{self.entry.entry_id}"
+        )
+
+    @callback
+    def async_add_coordinator(self, hub_id, devices):
+        """Create the coordinator of a hub, seeded with the given devices."""
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        snapshot = data["snapshot"]
+        coordinator = AjaxHubCoordinator(self.hass, self.entry, self.api, hub_id, devices)
+        data["coordinators"][hub_id] = coordinator
+        # Keep the device state in the snapshot fresh without writing on every poll
+        self.entry.async_on_unload(
+            coordinator.async_add_listener(
+                lambda: snapshot.async_delay_save(lambda: entry_snapshot_data(data))
+            )
+        )
+        return coordinator
+
+    @callback
+    def async_setup_hub(self, hub_id):
+        """Fetch the devices of a hub in the background, adding each as it arrives."""
+        if hub_id in self._hub_setups:
+            return
+        self._hub_setups[hub_id] = self.entry.async_create_background_task(
+            self.hass, self._setup_hub(hub_id), f"{DOMAIN}_setup_hub_{hub_id}"
+        )
+
+    @callback
+    def async_resume_setups(self):
+        """Start the hub setups that stopped on an auth failure again."""
+        coordinators = self.hass.data[DOMAIN][self.entry.entry_id]["coordinators"]
+        stalled, self._stalled_setups = self._stalled_setups, set()
+        for hub_id in stalled:
+            if hub_id in coordinators:
+                self.async_setup_hub(hub_id)
+
+    async def _setup_hub(self, hub_id):
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        delay = HUB_SETUP_RETRY_MIN
+        try:
+            while hub_id in data["coordinators"]:
+                try:
+                    changed, missing = await self._sync_hub(data, hub_id)
+                except ConfigEntryAuthFailed:
+                    self._stalled_setups.add(hub_id)
+                    self.entry.async_start_reauth(self.hass)
+                    return
+                except Exception as e:
+                    _LOGGER.warning("Setting up hub %s failed, retrying in %ds: %s", hub_id, delay, e)
+                else:
+                    if changed or not missing:
+                        await data["snapshot"].async_save(*entry_snapshot_data(data))
+                    if not missing:
+                        _LOGGER.debug("Hub %s set up", hub_id)
+                        return
+                    _LOGGER.warning(
+                        "%d devices of hub %s could not be fetched, retrying in %ds",
+                        missing, hub_id, delay,
+                    )
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                delay = min(delay * 2, HUB_SETUP_RETRY_MAX)
+        finally:
+            self._hub_setups.pop(hub_id, None)
+
+    async def async_sync(self):
+        if self._lock.locked():
+            return
+        async with self._lock:
+            try:
+                await self._sync()
+            except ConfigEntryAuthFailed:
+                self.entry.async_start_reauth(self.hass)
+            except Exception as e:
+                _LOGGER.warning("Syncing Ajax hubs and devices failed: %s", e)
+
+    async def _sync(self):
+        data = self.hass.data[DOMAIN][self.entry.entry_id]
+        hubs = await self.api.get_hubs()
+        if not hubs:
+            # Can't tell an empty account from a bad response, keep what we have
+            return
+        removed_hubs = set(data["coordinators"]) - {hub["hubId"] for hub in hubs}
+        data["hubs"] = hubs
+        for hub_id in removed_hubs:
+            _LOGGER.info("Removing Ajax hub %s, no longer on the account", hub_id)
+            await self._async_remove_hub(data, hub_id)
+        for hub in hubs:
+            if hub["hubId"] not in data["coordinators"]:
+                _LOGGER.info("Adding new Ajax hub %s", hub["hubId"])
+                self._async_add_hub(data, hub["hubId"])
+
+        # Hubs still being set up are synced by their own pipeline
+        hub_ids = [hub_id for hub_id in data["coordinators"] if hub_id not in self._hub_setups]
+        results = await asyncio.gather(
+            *(self._sync_hub(data, hub_id) for hub_id in hub_ids), return_exceptions=True
+        )
+        changed = bool(removed_hubs)
+        for hub_id, result in zip(hub_ids, results):
+            if isinstance(result, ConfigEntryAuthFailed):
+                raise result
+            if isinstance(result, BaseException):
+                _LOGGER.warning("Syncing the devices of hub %s failed: %s", hub_id, result)
+                continue
+            changed |= result[0]
+        if changed:
+            await data["snapshot"].async_save(*entry_snapshot_data(data))
+
+    @callback
+    def _async_add_hub(self, data, hub_id):
+        coordinator = self.async_add_coordinator(hub_id, [])
+        data["devices_by_hub"][hub_id] = []
+        stream = data.get("event_stream")
+        if stream is not None:
+            coordinator.async_set_push_connected(stream.connected)
+        # The panel fetches the hub state once added
+        data["hub_adder"](hub_id)
+        self.async_setup_hub(hub_id)
+
+    async def _async_remove_hub(self, data, hub_id):
+        setup = self._hub_setups.pop(hub_id, None)
+        if setup is not None:
+            setup.cancel()
+        coordinator = data["coordinators"].pop(hub_id)
+        data["devices_by_hub"].pop(hub_id, None)
+        # The panel and the entities of every device of the hub go with their devices
+        self._remove_from_registry(set(coordinator.device_ids), hub_ids={hub_id})
+        await coordinator.async_shutdown()
+
+    async def _sync_hub(self, data, hub_id):
+        """Add new and drop removed devices of a hub.
+
+        Returns whether anything changed, and how many new devices couldn't
+        be fetched; they are tried again on the next sync.
+        """
+        coordinator = data["coordinators"][hub_id]
+        async with self._semaphore:
+            listed = await self.api.get_hub_devices(hub_id, fresh=True)
+        if not isinstance(listed, list):
+            # An empty (204) or malformed response is a failed sync, not a hub without devices
+            raise AjaxAPIError(f"Unexpected device list for hub {hub_id}: {type(listed).__name__}")
+        listed_ids = [device["id"] for device in listed]
+        known = set(coordinator.device_ids)
+        new_ids = [device_id for device_id in listed_ids if device_id not in known]
+        # Can't tell a hub whose devices were all removed from a bad response, keep them
+        removed = known - set(listed_ids) if listed_ids else set()
+
+        added = 0
+        missing = 0
+        if new_ids:
+            _LOGGER.info("Adding %d new devices of hub %s", len(new_ids), hub_id)
+        # Entities are added per device as its info arrives, not after the slowest one
+        for fetched in asyncio.as_completed([self._fetch_device(hub_id, device_id) for device_id in new_ids]):
+            device_id, result = await fetched
+            if isinstance(result, ConfigEntryAuthFailed):
+                raise result
+            if isinstance(result, BaseException) or not result:
+                _LOGGER.warning("Fetching new device %s of hub %s failed: %s", device_id, hub_id, result)
+                missing += 1
+                continue
+            coordinator.async_add_devices([result])
+            data["devices_by_hub"][hub_id] = [
+                *data["devices_by_hub"].get(hub_id, []), device_summary(result)
+            ]
+            await self._async_add_entities(data, hub_id, [result])
+            added += 1
+        if removed:
+            _LOGGER.info("Removing %d devices no longer on hub %s", len(removed), hub_id)
+            self._remove_from_registry(removed)
+            coordinator.async_remove_devices(removed)
+            data["devices_by_hub"][hub_id] = [
+                device for device in data["devices_by_hub"].get(hub_id, []) if device["id"] not in removed
+            ]
+        return bool(added or removed), missing
+
+    async def _fetch_device(self, hub_id, device_id):
+        try:
+            async with self._semaphore:
+                return device_id, await self.api.get_device_info(hub_id, device_id)
+        except Exception as e:
+            return device_id, e
+
+    async def _async_add_entities(self, data, hub_id, devices):
+        platforms = set()
+        for device in devices:
+            platforms.update(device_platforms(device))
+        loaded = set(data["loaded_platforms"])
+        for platform in platforms & loaded:
+            adder = data["entity_adders"].get(platform)
+            if adder:
+                adder(hub_id, devices)
+
+        new_platforms = platforms - loaded
+        if not new_platforms:
+            return
+        # Their setup creates the entities of all known devices, the new ones included
+        data["loaded_platforms"] = [*data["loaded_platforms"], *new_platforms]
+        self.hass.config_entries.async_update_entry(
+            self.entry, data={**self.entry.data, "platforms": data["loaded_platforms"]}
+        )
+        await self.hass.config_entries.async_forward_entry_setups(self.entry, list(new_platforms))
+
+    @callback
+    def _remove_from_registry(self, device_ids, hub_ids=()):
+        registry = dr.async_get(self.hass)
+        hub_identifiers = {f"ajax_hub_{hub_id}" for hub_id in hub_ids}
+        for device in dr.async_entries_for_config_entry(registry, self.entry.entry_id):
+            if any(
+                domain == DOMAIN
+                and (identifier in hub_identifiers or _ajax_device_id(identifier) in device_ids)
+                for domain, identifier in device.identifiers
+            ):
+                # Also removes the entities of the device
+                registry.async_update_device(device.id, remove_config_entry_id=self.entry.entry_id)
+
+
+def _ajax_device_id(identifier):
+    # Device identifiers are "ajax_<id>" or "ajax_<id>_<device class>"
+    return identifier.removeprefix("ajax_").split("_", 1)[0]
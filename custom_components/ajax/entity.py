@@ -0,0 +1,64 @@
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+
+
+@callback
+def async_setup_device_platform(hass, entry, platform, async_add_entities, create_entities):
+    """Add the entities of every known device, and let discovery add more later.
+
+    ``create_entities(coordinator, hub_id, device)`` returns the entities one
+    device gets on this platform. The adder is kept in ``entity_adders`` so
+    devices found after setup get their entities without a reload.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def add_devices(hub_id, devices):
+        coordinator = data["coordinators"].get(hub_id)
+        async_add_entities(
+            [entity for device in devices for entity in create_entities(coordinator, hub_id, device)]
+        )
+
+    data["entity_adders"][platform] = add_devices
+    for hub_id, devices in data["devices_by_hub"].items():
+        add_devices(hub_id, devices)
+
+
+class AjaxDeviceEntity(CoordinatorEntity):
+    """Base for entities that show fields of one device of a hub coordinator.
+
+    State and attributes are read from ``device_state``, the AjaxDeviceState
+    record of the device that all its entities share. Subclasses list the
+    record attributes they depend on in ``_state_fields``; after a poll the
+    entity only writes its state when one of those changed, or when its
+    availability did.
+    """
+
+    _state_fields = ()
+
+    def __init__(self, coordinator, device):
+        super().__init__(coordinator)
+        self._device_id = device.get("id")
+        self._written_available = None
+
+    @property
+    def device_state(self):
+        """The device's record; None once it was removed, until the entity is gone too."""
+        return self.coordinator.data.get(self._device_id)
+
+    @property
+    def available(self):
+        return super().available and self.device_state is not None
+
+    @callback
+    def _handle_coordinator_update(self):
+        changed = self.coordinator.changed_fields.get(self._device_id)
+        available = self.available
+        if available == self._written_available and (
+            not changed or changed.isdisjoint(self._state_fields)
+        ):
+            return
+        self._written_available = available
+        self.async_write_ha_state()
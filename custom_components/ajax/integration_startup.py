@@ -1,66 +1,94 @@
 import logging
-from aiohttp import ClientSession, ClientTimeout
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .const import DOMAIN
-from .device_mapper import map_ajax_device
+from .device_mapper import device_platforms
+from .device_state import device_summary
 from .api import AjaxAPI
+from .discovery import AjaxDeviceDiscovery
+from .snapshot import AjaxSnapshot
+from .stream import AjaxEventStream
+from .tokens import AjaxTokenStore, newest_tokens
 _LOGGER = logging.getLogger(__name__)
 
 async def do_setup(hass, entry):
-    _LOGGER.error(f"INIT HASS: {hass!r} ({bool(hass)}) ENTRY: {entry!r} ({bool(entry)})")
-    session = ClientSession(timeout=ClientTimeout(total=10))
-    api = AjaxAPI(entry.data, hass, entry, session)
+    # Home Assistant's shared session: one keep-alive pool with DNS caching
+    # and TLS session reuse, closed by Home Assistant itself on shutdown.
+    # Every request sets its own timeout.
+    # Tokens refreshed since the last login are kept in their own store
+    token_store = AjaxTokenStore(hass, entry.entry_id)
+    tokens = newest_tokens(entry.data, await token_store.async_load())
+    api = AjaxAPI(tokens, hass, entry, async_get_clientsession(hass), token_store=token_store)
+    snapshot = AjaxSnapshot(hass, entry.entry_id)
     hass.data[DOMAIN][entry.entry_id]["api"] = api
-    hass.data[DOMAIN][entry.entry_id]["session"] = session
+    hass.data[DOMAIN][entry.entry_id]["snapshot"] = snapshot
+    api.async_start_token_refresh()
+    entry.async_on_unload(api.async_stop_token_refresh)
+    entry.async_on_unload(api.rate_limiter.cancel)
 
+    # Start from the last known topology when there is one, and check it
+    # against the cloud once the entities are already there
+    cached = await snapshot.async_load()
+    if cached:
+        _LOGGER.info("Setting up %d hubs from snapshot", len(cached["hubs"]))
+        await _setup_platforms(hass, entry, api, cached["hubs"], cached["devices_by_hub"])
+        # Devices added or removed meanwhile are picked up without a reload
+        entry.async_create_background_task(
+            hass,
+            hass.data[DOMAIN][entry.entry_id]["discovery"].async_sync(),
+            f"{DOMAIN}_refresh_{entry.entry_id}",
+        )
+        return True
 
     # Only refresh token if session token is expired or close to expiring
     if api.is_token_expired():
         await api.update_refresh_token()
-       
-   
-    # Get list of hubs
+
+    # Only the hub list is needed up front: the panels come online with their
+    # hub state, and the devices of every hub stream in from its own pipeline
     hubs = await api.get_hubs()
     if not hubs or not isinstance(hubs, list):
         _LOGGER.error("No hubs returned from API or invalid format. Got: %s", type(hubs))
         return False
-    hass.data[DOMAIN][entry.entry_id]["hubs"] = hubs
-    _LOGGER.error("Received %d hubs", len(hubs))
-
-    # Get devices per hub
-    devices_by_hub = {}
-    all_devices = []
-
+    _LOGGER.debug("Received %d hubs", len(hubs))
+    await _setup_platforms(hass, entry, api, hubs, {hub["hubId"]: [] for hub in hubs})
+    discovery = hass.data[DOMAIN][entry.entry_id]["discovery"]
     for hub in hubs:
-        hub_id = hub["hubId"]
-        _LOGGER.warning("Fetching devices for hub: %s", hub_id)
-        devices = await api.get_hub_devices(hub_id)
-        full_devices = []
+        discovery.async_setup_hub(hub["hubId"])
+    return True
 
-       for device in devices:
-           device_id = device["id"]
-           full_info = await api.get_device_info(hub_id, device_id)
 
-           if full_info:
-               full_devices.append(full_info)
-        devices_by_hub[hub_id] = full_devices
-        
-        all_devices.extend(full_devices)
+async def _setup_platforms(hass, entry, api, hubs, devices_by_hub):
+    data = hass.data[DOMAIN][entry.entry_id]
 
     # Store devices in memory
-    hass.data[DOMAIN][entry.entry_id]["devices_by_hub"] = devices_by_hub
+    data["hubs"] = hubs
+    # Full payloads only seed the coordinators, entities are created from these
+    data["devices_by_hub"] = {
+        hub_id: [device_summary(device) for device in devices]
+        for hub_id, devices in devices_by_hub.items()
+    }
+    # Per platform, adds the entities of devices discovered later
+    data["entity_adders"] = {}
 
+    discovery = AjaxDeviceDiscovery(hass, entry, api)
+    data["discovery"] = discovery
 
+    # One coordinator per hub, shared by the entities of every platform
+    data["coordinators"] = {}
+    for hub_id, devices in devices_by_hub.items():
+        discovery.async_add_coordinator(hub_id, devices)
 
     # Determine required platforms based on device types
     platforms = set()
-    for device in all_devices:
-        mappings = map_ajax_device(device)
-        for platform, _ in mappings:
-            platforms.add(platform)
+    for devices in devices_by_hub.values():
+        for device in devices:
+            platforms.update(device_platforms(device))
 
-    # Ensure alarm panel is always registered
+    # Ensure alarm panel is always registered, and sensor for the API metrics
     platforms.add("alarm_control_panel")
-    
+    platforms.add("sensor")
+
 
     hass.config_entries.async_update_entry(
         entry,
@@ -71,8 +99,38 @@ async def do_setup(hass, entry):
     )
     # Forward setup to all required platforms
     await hass.config_entries.async_forward_entry_setups(entry, list(platforms))
-    hass.data[DOMAIN][entry.entry_id]["loaded_platforms"] = list(platforms)
-    
-    return True
+    data["loaded_platforms"] = list(platforms)
+
+    # Pushed changes on top of polling, for as long as the proxy streams them
+    stream = AjaxEventStream(hass, entry, api)
+    data["event_stream"] = stream
+    stream.async_start()
+    entry.async_on_unload(stream.async_stop)
 
-        
+    discovery.async_start()
+
+
+
+@callback
+def async_apply_tokens(hass, entry, session_token, refresh_token, created_at):
+    """Put the tokens of a reauth into the running entry, without reloading it.
+
+    Polling stops on an auth failure, so every hub is refreshed right away;
+    the event stream and the hubs whose setup gave up are started again.
+    """
+    data = hass.data[DOMAIN][entry.entry_id]
+    data["api"].async_set_tokens(session_token, refresh_token, created_at)
+    data.update(
+        {
+            "session_token": session_token,
+            "refresh_token": refresh_token,
+            "token_created_at": created_at,
+        }
+    )
+    for coordinator in data["coordinators"].values():
+        hass.async_create_task(coordinator.async_request_refresh())
+    stream = data["event_stream"]
+    if not stream.unsupported:
+        stream.async_start()
+    # The topology is unchanged, a full sync is left to the next discovery interval
+    data["discovery"].async_resume_setups()
@@ -0,0 +1,95 @@
+import math
+from collections import Counter, deque
+
+# Latency samples kept per operation for the percentiles
+LATENCY_WINDOW = 200
+
+
+class ApiMetrics:
+    """Call volume, errors and latency of the Ajax API, per operation.
+
+    Latency percentiles are computed over the last ``LATENCY_WINDOW`` calls of
+    each operation; counters cover the lifetime of the config entry.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._window = window
+        self.calls = Counter()
+        self.errors = Counter()
+        self.latencies = {}
+        self.token_refreshes = 0
+        self.token_refresh_failures = 0
+        self.origin_hits = 0
+        self.origin_misses = 0
+        self.token_waits = 0
+        self.token_wait_seconds = 0.0
+        self.queue_wait_seconds = Counter()
+        self.queue_wait_max = Counter()
+
+    def record(self, operation, seconds, error=False):
+        self.calls[operation] += 1
+        if error:
+            self.errors[operation] += 1
+        if operation not in self.latencies:
+            self.latencies[operation] = deque(maxlen=self._window)
+        self.latencies[operation].append(seconds)
+
+    def record_token_refresh(self, ok):
+        if ok:
+            self.token_refreshes += 1
+        else:
+            self.token_refresh_failures += 1
+
+    def record_token_wait(self, seconds):
+        """Time a request spent held up by a session token refresh."""
+        self.token_waits += 1
+        self.token_wait_seconds += seconds
+
+    def record_queue_wait(self, lane, seconds):
+        """Time a request waited for the rate limiter in ``lane``."""
+        self.queue_wait_seconds[lane] += seconds
+        self.queue_wait_max[lane] = max(self.queue_wait_max[lane], seconds)
+
+    def record_origin_hit(self, header):
+        if header is None:
+            return
+        if header.lower() in ("1", "true", "hit"):
+            self.origin_hits += 1
+        else:
+            self.origin_misses += 1
+
+    @property
+    def origin_hit_ratio(self):
+        total = self.origin_hits + self.origin_misses
+        return self.origin_hits / total if total else None
+
+    def percentile(self, q, operation=None):
+        """Latency percentile in seconds, for one operation or all of them."""
+        if operation is None:
+            samples = [s for window in self.latencies.values() for s in window]
+        else:
+            samples = list(self.latencies.get(operation, ()))
+        if not samples:
+            return None
+        samples.sort()
+        # Nearest-rank percentile
+        return samples[max(0, math.ceil(q / 100 * len(samples)) - 1)]
+
+    def as_dict(self):
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "latency": {
+                operation: {
+                    f"p{q}": self.percentile(q, operation) for q in (50, 95, 99)
+                }
+                for operation in self.latencies
+            },
+            "token_refreshes": self.token_refreshes,
+            "token_refresh_failures": self.token_refresh_failures,
+            "token_waits": self.token_waits,
+            "token_wait_seconds": round(self.token_wait_seconds, 4),
+            "origin_hit_ratio": self.origin_hit_ratio,
+            "queue_wait_seconds": {lane: round(s, 4) for lane, s in self.queue_wait_seconds.items()},
+            "queue_wait_max": {lane: round(s, 4) for lane, s in self.queue_wait_max.items()},
+        }
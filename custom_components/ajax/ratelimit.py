@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+
+LANE_COMMAND = "command"
+LANE_POLL = "poll"
+
+
+class AccountRateLimiter:
+    """Token bucket shared by every request of an Ajax account, with two lanes.
+
+    Requests in the command lane are always let through before waiting polls,
+    and polls may not spend the last ``command_reserve`` tokens, so an arm or
+    disarm sent during a poll burst goes out right away instead of queueing
+    behind dozens of ``device_info`` calls. Polls use whatever budget is left.
+    """
+
+    def __init__(self, rate, burst, command_reserve=0):
+        self.rate = rate
+        self.burst = burst
+        self.command_reserve = min(command_reserve, burst - 1)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = {LANE_COMMAND: deque(), LANE_POLL: deque()}
+        self._timer = None
+
+    async def acquire(self, lane=LANE_POLL):
+        """Wait for a token in ``lane``; returns how long that took."""
+        start = time.monotonic()
+        waiters = self._waiters[lane]
+        if not any(self._waiters.values()):
+            self._refill()
+            if self._tokens >= self._needed(lane):
+                self._tokens -= 1
+                return 0.0
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Got a token but won't use it
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._dispatch()
+            raise
+        return time.monotonic() - start
+
+    def cancel(self):
+        """Drop the pending dispatch and everything still waiting, e.g. on unload."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for waiters in self._waiters.values():
+            while waiters:
+                waiters.popleft().cancel()
+
+    def _needed(self, lane):
+        return 1 if lane == LANE_COMMAND else 1 + self.command_reserve
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self):
+        self._refill()
+        for lane in (LANE_COMMAND, LANE_POLL):
+            waiters = self._waiters[lane]
+            while waiters:
+                if waiters[0].done():
+                    # Cancelled while waiting
+                    waiters.popleft()
+                    continue
+                if self._tokens < self._needed(lane):
+                    break
+                self._tokens -= 1
+                waiters.popleft().set_result(None)
+            if waiters:
+                # Polls wait for anything still queued in the command lane
+                self._schedule(self._needed(lane) - self._tokens)
+                return
+
+    def _schedule(self, missing):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(
+            max(missing, 0) / self.rate, self._on_timer
+        )
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
@@ -1,68 +1,62 @@
-from homeassistant.components.sensor import SensorEntity
+from datetime import timedelta
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime
+from homeassistant.helpers.device_registry import DeviceEntryType
 from .const import DOMAIN
-from .device_mapper import map_ajax_device
-from .api import AjaxAPI
+from .entity import AjaxDeviceEntity, async_setup_device_platform
+from .device_mapper import device_entities
+from .trace import trace
 import logging
 _LOGGER = logging.getLogger(__name__)
 
+# Only the API metric sensors poll, device sensors follow their coordinator
+SCAN_INTERVAL = timedelta(seconds=60)
+
 async def async_setup_entry(hass, entry, async_add_entities):
-    devices_by_hub = hass.data[DOMAIN][entry.entry_id]["devices_by_hub"]
-    entities = []
-    data = hass.data[DOMAIN][entry.entry_id]
     api = hass.data[DOMAIN][entry.entry_id]["api"]
-    _LOGGER.error("SETUP ENTRY: %s", devices_by_hub)
-    for hub_id, devices in devices_by_hub.items():
-
-        for device in devices:
-            for platform, meta in map_ajax_device(device):
-                if platform != "sensor":
-                    continue
-                if meta.get("device_class") == "temperature":
-                    entity = FireProtectSensor(device, meta, hub_id, api)
-                elif meta.get("device_class") == "door_temperature":
-                    entity = DoorProtectSensor(device, meta, hub_id, api)  
-                elif meta.get("device_class") == "motion_temperature":
-                    entity = MotionProtectSensor(device, meta, hub_id, api)              
-                else:
-                    
-                    entity = AjaxSensor(device, meta, hub_id, api)
-                entities.append(entity)
-                
-    async_add_entities(entities)
-
-
-class AjaxSensor(SensorEntity):
-    def __init__(self, device, meta, hub_id, api):
-        self._device = device
+    async_add_entities([AjaxApiMetricSensor(entry, api, *metric) for metric in API_METRICS])
+    async_setup_device_platform(hass, entry, "sensor", async_add_entities, _create_entities)
+
+
+def _create_entities(coordinator, hub_id, device):
+    for meta in device_entities(device, "sensor"):
+        if meta.get("device_class") == "temperature":
+            yield FireProtectSensor(coordinator, device, meta, hub_id)
+        elif meta.get("device_class") == "door_temperature":
+            yield DoorProtectSensor(coordinator, device, meta, hub_id)
+        elif meta.get("device_class") == "motion_temperature":
+            yield MotionProtectSensor(coordinator, device, meta, hub_id)
+        else:
+            yield AjaxSensor(coordinator, device, meta, hub_id)
+
+
+
+class AjaxSensor(AjaxDeviceEntity, SensorEntity):
+    _state_fields = ("battery",)
+
+    def __init__(self, coordinator, device, meta, hub_id):
+        super().__init__(coordinator, device)
         self.hub_id = hub_id
         self._meta = meta
         self._attr_name = device.get("deviceName") + f" ({device.get('id')})"
         self._attr_unique_id = f"ajax_{device.get('id')}_{meta.get('device_class')}"
         self._attr_device_class = meta.get("device_class")
         self._attr_native_unit_of_measurement = meta.get("unit")
-        self.api = api
-        self._battery = None
-        self._native_value = None
-        _LOGGER.error("AJAX device data - DENTRO SENSOR: %s", self._device)
-        _LOGGER.error("Mapped meta - DENTRO SENSOR: %s", self._meta)
+        trace("sensor_init", device=device, meta=meta)
 
     @property
     def native_value(self):     
-        return self._native_value
+        return None
     @property
     def extra_state_attributes(self):
         return {
-            "battery_level": self._battery,
+            "battery_level": self.device_state.battery,
         }
 
-    async def async_update(self):
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._battery = device_info.get('batteryChargeLevelPercentage')
-
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}_{self._meta.get('device_class')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}_{self._meta.get('device_class')}")},
             "name": self._attr_name,
             "manufacturer": "Ajax",
             "model": self._meta.get("device_class", "Unknown"),
@@ -72,105 +66,123 @@ class AjaxSensor(SensorEntity):
 
 
 class FireProtectSensor(AjaxSensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._temperature = None
-
+    _state_fields = ("battery", "temperature")
 
     @property
     def native_value(self):
-        return self._temperature
-
-    @property
-    def extra_state_attributes(self):
-        attrs = super().extra_state_attributes.copy()
-        return attrs
+        return self.device_state.temperature
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "name": "Ajax FireProtectPlus",
             "manufacturer": "Ajax",
             "model": "FireProtectPlus",
         }
 
-    async def async_update(self):
-        await super().async_update() # updating in parent class
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._temperature = device_info.get('temperature')
-
             
             
 class DoorProtectSensor(AjaxSensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._temperature = None
-         # INIZIALIZZA QUI i valori usati in device_info
-        #device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._name_from_api = device.get("deviceName")
-        self._model_version = device.get("deviceType", "Unknown")
-        self._firmware_version = device.get("firmwareVersion", "0")
-        self._serial_number = device.get("id", "0")
-
-        _LOGGER.error("AJAX device data - DENTRO DOORPROTECT: %s", self._device)
-        _LOGGER.error("AJAX DEVICEGET - DENTRO DOORPROTECT: %s", device)
-        _LOGGER.error("Mapped meta - DENTRO DOORPROTECT: %s", self._meta)
+    _state_fields = ("battery", "temperature")
 
     @property
     def native_value(self):
-        return self._temperature
-
-
-    async def async_update(self):
-        await super().async_update() # updating in parent class
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        # Salva i campi che ti interessano
-        self._name_from_api = device_info.get('deviceName')
-        #self._model_version = device_info.get('deviceType')
-        self._temperature = device_info.get('temperature')
-        self._firmware_version = device_info.get('firmwareVersion')
-        #self._serial_number = device_info.get('id')
-        _LOGGER.error("AJAX device data - DENTRO DOORPROTECT UPDATE: %s", device_info)
-        _LOGGER.error("Mapped meta - DENTRO DOORPROTECT UPDATE: %s", device_info)
-        
-        # Se l’API fornisce hw data
-
-
+        return self.device_state.temperature
 
     @property
     def device_info(self):
+        state = self.device_state
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
             "via_device": (DOMAIN, f"ajax_hub_{self.hub_id}"),  # <–– qui!
-            "name": self._name_from_api,
+            "name": state.name,
             "manufacturer": "Ajax",
-            "model": self._model_version,
-            "sw_version": self._firmware_version,
-            "serial_number": self._serial_number,
+            "model": state.device_type or "Unknown",
+            "sw_version": state.firmware_version,
+            "serial_number": self._device_id or "0",
         }
 
 class MotionProtectSensor(AjaxSensor):
-    def __init__(self, device, meta, hub_id, api):
-        super().__init__(device, meta, hub_id, api)
-        self._temperature = None
+    _state_fields = ("battery", "temperature")
 
     @property
     def native_value(self):
-        return self._temperature
+        return self.device_state.temperature
 
+    @property
+    def device_info(self):
+        return {
+            "identifiers": {(DOMAIN, f"ajax_{self._device_id}")},
+            "name": "Ajax MotionProtect",
+            "manufacturer": "Ajax",
+            "model": "MotionProtect",
+        }
+
+
+def _latency_ms(q):
+    def value(metrics, operation=None):
+        seconds = metrics.percentile(q, operation)
+        return None if seconds is None else round(seconds * 1000, 1)
+    return value
+
+
+def _origin_hit_ratio(metrics, operation=None):
+    ratio = metrics.origin_hit_ratio
+    return None if ratio is None else round(ratio * 100, 1)
+
+
+# key, name, unit, state class, value(metrics, operation=None)
+API_METRICS = (
+    ("api_requests", "API requests", None, SensorStateClass.TOTAL_INCREASING,
+     lambda metrics, operation=None: metrics.calls[operation] if operation else sum(metrics.calls.values())),
+    ("api_errors", "API errors", None, SensorStateClass.TOTAL_INCREASING,
+     lambda metrics, operation=None: metrics.errors[operation] if operation else sum(metrics.errors.values())),
+    ("api_latency_p50", "API latency p50", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT, _latency_ms(50)),
+    ("api_latency_p95", "API latency p95", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT, _latency_ms(95)),
+    ("api_latency_p99", "API latency p99", UnitOfTime.MILLISECONDS, SensorStateClass.MEASUREMENT, _latency_ms(99)),
+    ("token_refreshes", "Token refreshes", None, SensorStateClass.TOTAL_INCREASING,
+     lambda metrics, operation=None: metrics.token_refreshes),
+    ("origin_hit_ratio", "Origin hit ratio", PERCENTAGE, SensorStateClass.MEASUREMENT, _origin_hit_ratio),
+)
+
+# Metrics that also have a value per API operation, shown as attributes
+PER_OPERATION_METRICS = ("api_requests", "api_errors", "api_latency_p50", "api_latency_p95", "api_latency_p99")
 
-    async def async_update(self):
-        await super().async_update() # updating in parent class
-        device_info = await self.api.get_device_info(self.hub_id, self._device.get('id'))
-        self._temperature = device_info.get('temperature')
 
+class AjaxApiMetricSensor(SensorEntity):
+    """Diagnostic sensor with one metric of the API client of a config entry."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, entry, api, key, name, unit, state_class, value):
+        self._api = api
+        self._key = key
+        self._value = value
+        self._entry_id = entry.entry_id
+        self._attr_name = f"Ajax {name}"
+        self._attr_unique_id = f"ajax_{entry.entry_id}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+
+    @property
+    def native_value(self):
+        return self._value(self._api.metrics)
+
+    @property
+    def extra_state_attributes(self):
+        metrics = self._api.metrics
+        if self._key == "token_refreshes":
+            return {"failures": metrics.token_refresh_failures}
+        if self._key not in PER_OPERATION_METRICS:
+            return None
+        return {operation: self._value(metrics, operation) for operation in metrics.latencies}
 
     @property
     def device_info(self):
         return {
-            "identifiers": {(DOMAIN, f"ajax_{self._device.get('id')}")},
-            "name": "Ajax MotionProtect",
+            "identifiers": {(DOMAIN, f"ajax_api_{self._entry_id}")},
+            "name": "Ajax API",
             "manufacturer": "Ajax",
-            "model": "MotionProtect",
+            "entry_type": DeviceEntryType.SERVICE,
         }
@@ -1,20 +1,15 @@
 from homeassistant.components.siren import SirenEntity
-from .const import DOMAIN
-from .device_mapper import map_ajax_device
+from .device_mapper import device_entities
+from .entity import async_setup_device_platform
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    devices_by_hub = hass.data[DOMAIN][entry.entry_id]["devices_by_hub"]
-    entities = []
-
-    for hub_id, devices in devices_by_hub.items():
-        for device in devices:
-            for platform, meta in map_ajax_device(device):
-                if platform != "siren":
-                    continue
-                entity = AjaxSiren(device, meta, hub_id)
-                entities.append(entity)
-
-    async_add_entities(entities)
+    async_setup_device_platform(hass, entry, "siren", async_add_entities, _create_entities)
+
+
+def _create_entities(coordinator, hub_id, device):
+    for meta in device_entities(device, "siren"):
+        yield AjaxSiren(device, meta, hub_id)
+
 
 
 class AjaxSiren(SirenEntity):
@@ -0,0 +1,57 @@
+import logging
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Device state changes often, so state-only updates are written lazily
+SNAPSHOT_SAVE_DELAY = 300
+
+
+class AjaxSnapshot:
+    """Last known hubs and devices of a config entry, kept in .storage.
+
+    Lets the integration create its entities on startup without waiting for
+    the cloud; the snapshot is refreshed from the API in the background.
+    """
+
+    def __init__(self, hass, entry_id):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot")
+
+    async def async_load(self):
+        try:
+            data = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Could not load the Ajax snapshot, doing a full setup: %s", e)
+            return None
+        if not data or not data.get("hubs"):
+            return None
+        return data
+
+    async def async_save(self, hubs, devices_by_hub):
+        await self._store.async_save(_as_data(hubs, devices_by_hub))
+
+    def async_delay_save(self, data_func):
+        """Schedule a coalesced write; ``data_func`` returns (hubs, devices_by_hub)."""
+        self._store.async_delay_save(lambda: _as_data(*data_func()), SNAPSHOT_SAVE_DELAY)
+
+    async def async_remove(self):
+        await self._store.async_remove()
+
+
+def entry_snapshot_data(data):
+    """(hubs, devices_by_hub) of a running entry, from ``hass.data[DOMAIN][entry_id]``."""
+    return data["hubs"], {
+        hub_id: [device.as_payload() for device in coordinator.data.values()]
+        for hub_id, coordinator in data["coordinators"].items()
+    }
+
+
+def _as_data(hubs, devices_by_hub):
+    return {
+        "hubs": hubs,
+        "devices_by_hub": devices_by_hub,
+    }
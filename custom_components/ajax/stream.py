@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+
+from .api import AjaxAPIError, EventStreamUnsupported
+from .const import DOMAIN, EVENT_STREAM_RETRY_MAX, EVENT_STREAM_RETRY_MIN
+from .trace import trace
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AjaxEventStream:
+    """Applies the device and hub changes pushed by the proxy to the coordinators.
+
+    Keeps one server-sent event connection per config entry. Each event is a
+    JSON object, ``{"type": "device", "hub_id": ..., "device": {"id": ..., ...}}``
+    or ``{"type": "hub", "hub_id": ..., "hub": {...}}``, holding only the fields
+    that changed. While the stream is up the coordinators only poll as a slow
+    safety net; when it drops they go back to adaptive polling right away and
+    the stream reconnects with backoff. A proxy without the endpoint leaves
+    the entry on polling.
+    """
+
+    def __init__(self, hass, entry, api):
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        self.connected = False
+        self.connects = 0
+        self.events = 0
+        self.last_event_at = None
+        self.unsupported = False
+        self._alive = False
+        self._task = None
+        # Kept so a stream stopped after hass.data was cleared on unload can still finish
+        self._coordinators = hass.data[DOMAIN][entry.entry_id]["coordinators"]
+
+    @callback
+    def async_start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._run(), f"{DOMAIN}_events_{self.entry.entry_id}"
+        )
+
+    @callback
+    def async_stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def as_dict(self):
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "events": self.events,
+            "last_event_age": round(time.monotonic() - self.last_event_at, 1)
+            if self.last_event_at
+            else None,
+            "unsupported": self.unsupported,
+        }
+
+    async def _run(self):
+        delay = EVENT_STREAM_RETRY_MIN
+        while True:
+            # Set by _consume once the proxy actually sends something
+            self._alive = False
+            try:
+                resp = await self.api.open_event_stream()
+                try:
+                    await self._consume(resp)
+                finally:
+                    resp.close()
+                _LOGGER.debug("Ajax event stream closed by the proxy")
+            except asyncio.CancelledError:
+                # Stopped on unload, the coordinators are shut down with the entry
+                raise
+            except EventStreamUnsupported:
+                _LOGGER.info("The Ajax proxy has no event stream, using polling only")
+                self.unsupported = True
+                self._set_connected(False)
+                return
+            except ConfigEntryAuthFailed:
+                # Polling runs into it too and starts the reauth flow
+                self._set_connected(False)
+                return
+            except (AjaxAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                _LOGGER.debug("Ajax event stream dropped: %r", e)
+            except Exception as e:
+                _LOGGER.warning("Ajax event stream failed: %r", e)
+            # Whatever else ended the connection, the coordinators go back to polling
+            self._set_connected(False)
+            if self._alive:
+                delay = EVENT_STREAM_RETRY_MIN
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, EVENT_STREAM_RETRY_MAX)
+
+    def _set_connected(self, connected):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        _LOGGER.debug("Ajax event stream %s", "connected" if connected else "disconnected")
+        for coordinator in self._coordinators.values():
+            coordinator.async_set_push_connected(connected)
+
+    async def _consume(self, resp):
+        data = []
+        async for raw in resp.content:
+            if not self._alive:
+                # Only a stream that delivers an event or heartbeat counts as up
+                self._alive = True
+                self.connects += 1
+                self._set_connected(True)
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if not line:
+                # A blank line ends an event
+                if data:
+                    self._apply("\n".join(data))
+                    data = []
+                continue
+            if line.startswith(":"):
+                continue  # heartbeat
+            name, _, value = line.partition(":")
+            if name == "data":
+                data.append(value[1:] if value.startswith(" ") else value)
+
+    def _apply(self, text):
+        try:
+            event = json.loads(text)
+            coordinator = self._coordinators.get(event.get("hub_id"))
+        except (ValueError, AttributeError):
+            _LOGGER.debug("Ignoring malformed Ajax event: %s", text)
+            return
+        self.events += 1
+        self.last_event_at = time.monotonic()
+        trace("stream_event", payload=event)
+        if coordinator is None:
+            return
+        if event.get("type") == "device" and isinstance(event.get("device"), dict):
+            coordinator.async_apply_device_delta(event["device"].get("id"), event["device"])
+        elif event.get("type") == "hub" and isinstance(event.get("hub"), dict):
+            coordinator.async_apply_hub_delta(event["hub"])
@@ -1,34 +1,31 @@
 from homeassistant.components.switch import SwitchEntity
-from .const import DOMAIN
-from .device_mapper import map_ajax_device
+from .device_mapper import device_entities
+from .entity import AjaxDeviceEntity, async_setup_device_platform
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    devices_by_hub = hass.data[DOMAIN][entry.entry_id]["devices_by_hub"]
-    entities = []
+    async_setup_device_platform(hass, entry, "switch", async_add_entities, _create_entities)
 
-    for hub_id, devices in devices_by_hub.items():
-        for device in devices:
-            for platform, meta in map_ajax_device(device):
-                if platform != "switch":
-                    continue
-                entity = AjaxSwitch(device, meta, hub_id)
-                entities.append(entity)
 
-    async_add_entities(entities)
+def _create_entities(coordinator, hub_id, device):
+    for meta in device_entities(device, "switch"):
+        yield AjaxSwitch(coordinator, device, meta, hub_id)
 
 
 
-class AjaxSwitch(SwitchEntity):
-    def __init__(self, device, hub_id):
-        self._device = device
+class AjaxSwitch(AjaxDeviceEntity, SwitchEntity):
+    _state_fields = ("state",)
+
+    def __init__(self, coordinator, device, meta, hub_id):
+        super().__init__(coordinator, device)
+        self._meta = meta
         self.hub_id = hub_id
         self._attr_name = device.get("deviceName") + f" ({device.get('id')})"
         self._attr_unique_id = f"ajax_{device.get('id')}"
 
     @property
     def is_on(self):
-        return self._device.get("state") == "on"
+        return self.device_state.state == "on"
 
     async def async_turn_on(self, **kwargs):
         # TODO: вызвать API для включения
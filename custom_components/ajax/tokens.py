@@ -0,0 +1,48 @@
+import logging
+
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# The session token changes every refresh and is cheap to get again, so it is
+# only written after this long without a refresh, or on shutdown
+TOKEN_SAVE_DELAY = 3600
+
+
+class AjaxTokenStore:
+    """Latest session and refresh tokens of a config entry, kept in .storage.
+
+    Keeps the ~14 minute token refreshes out of the config entry, so they
+    neither rewrite ``core.config_entries`` nor fire its update listeners.
+    The entry itself only gets the tokens of a login or reauth.
+    """
+
+    def __init__(self, hass, entry_id):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.tokens")
+
+    async def async_load(self):
+        try:
+            return await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("Could not load the stored Ajax tokens, using the entry's: %s", e)
+            return None
+
+    async def async_save(self, tokens):
+        await self._store.async_save(tokens)
+
+    def async_delay_save(self, data_func):
+        """Schedule a coalesced write; ``data_func`` returns the tokens."""
+        self._store.async_delay_save(data_func, TOKEN_SAVE_DELAY)
+
+    async def async_remove(self):
+        await self._store.async_remove()
+
+
+def newest_tokens(entry_data, stored):
+    """Entry data with the stored tokens applied, when they are newer than its own."""
+    if stored and stored.get("token_created_at", 0) > entry_data.get("token_created_at", 0):
+        return {**entry_data, **stored}
+    return entry_data
@@ -0,0 +1,53 @@
+"""Sampled trace mode for the Ajax integration.
+
+Off by default. When switched on with the ``ajax.set_trace`` service, hot-path
+events (API requests, device payloads, token checks) are logged at DEBUG on the
+``custom_components.ajax.trace`` logger, for a ``sample_rate`` fraction of them.
+Records are structured: the event name plus its fields, also passed as
+``extra={"ajax_trace": ...}``. Fields are only formatted when a handler emits
+the record, and a field given as a callable is only called then, so a disabled
+trace costs one attribute check.
+"""
+import json
+import logging
+import random
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Fields:
+    """Formats the fields of a trace record when the record is emitted."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        values = {
+            key: value() if callable(value) else value for key, value in self.fields.items()
+        }
+        return json.dumps(values, default=repr, sort_keys=True)
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 1.0
+
+    def configure(self, enabled, sample_rate=1.0):
+        self.enabled = enabled
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        # Emit regardless of the configured log level while tracing
+        _LOGGER.setLevel(logging.DEBUG if enabled else logging.NOTSET)
+        _LOGGER.warning(
+            "Ajax trace mode %s (sample rate %.2f)", "on" if enabled else "off", self.sample_rate
+        )
+
+    def __call__(self, event, /, **fields):
+        if not self.enabled or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return
+        _LOGGER.debug("%s %s", event, _Fields(fields), extra={"ajax_trace": fields})
+
+
+trace = Tracer()
@@ -0,0 +1,51 @@
+"""Fixtures for the Ajax integration tests, run against tools/fake_cloud.py."""
+import time
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ajax.api import AjaxAPI
+from custom_components.ajax.const import DOMAIN
+from fake_cloud import FakeAjaxCloud
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture
+async def fake_cloud(socket_enabled):
+    # No event stream: its task never ends, and setup waits for background tasks
+    cloud = FakeAjaxCloud(hubs=2, devices_per_hub=6, seed=0, stream=False)
+    url = await cloud.start()
+    with patch.object(AjaxAPI, "base_url", url):
+        yield cloud
+    await cloud.stop()
+
+
+@pytest.fixture
+def config_entry(hass, fake_cloud):
+    session_token, refresh_token = fake_cloud.issue_tokens()
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "session_token": session_token,
+            "refresh_token": refresh_token,
+            "user_id": "FAKEUSER",
+            "token_created_at": time.time(),
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+async def setup_entry(hass, config_entry):
+    """The config entry, set up with every hub and device fetched."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    yield config_entry
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
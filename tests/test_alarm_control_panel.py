@@ -0,0 +1,80 @@
+from unittest.mock import AsyncMock
+
+import aiohttp
+import pytest
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import async_capture_events
+
+from custom_components.ajax import coordinator as coordinator_module
+from custom_components.ajax.const import DOMAIN
+from fake_cloud import Faults
+
+HUB_ID = "00000000"
+
+
+@pytest.fixture(autouse=True)
+def fast_confirmation(monkeypatch):
+    monkeypatch.setattr(coordinator_module, "COMMAND_CONFIRM_INTERVAL", 0.01)
+
+
+def _panel_id(hass):
+    return er.async_get(hass).async_get_entity_id("alarm_control_panel", DOMAIN, f"ajax_{HUB_ID}_alarm")
+
+
+def _hub_reads(cloud):
+    return cloud.stats["targets"][f"hub_info:{HUB_ID}"]
+
+
+async def _arm_away(hass):
+    await hass.services.async_call(
+        "alarm_control_panel", "alarm_arm_away", {"entity_id": _panel_id(hass)}, blocking=True
+    )
+
+
+async def test_command_is_confirmed_as_soon_as_the_hub_reports_it(hass, setup_entry, fake_cloud):
+    changes = async_capture_events(hass, "state_changed")
+    fake_cloud.reset_stats()
+
+    await _arm_away(hass)
+    await hass.async_block_till_done()
+
+    states = [event.data["new_state"].state for event in changes if event.data["entity_id"] == _panel_id(hass)]
+    assert states == ["arming", "armed_away"]
+    # The fake cloud applies the command right away, one check confirms it
+    assert _hub_reads(fake_cloud) == 1
+
+
+async def test_confirmation_gives_up_at_the_deadline(hass, setup_entry, fake_cloud):
+    coordinator = hass.data[DOMAIN][setup_entry.entry_id]["coordinators"][HUB_ID]
+    fake_cloud.reset_stats()
+
+    confirmed = await coordinator.async_confirm_hub_state(lambda state: state == "ARMED", timeout=0.1)
+
+    assert not confirmed
+    assert coordinator.hub_info["state"] == "DISARMED"
+    assert _hub_reads(fake_cloud) > 1
+
+
+async def test_failed_command_clears_the_transitional_state(hass, setup_entry, fake_cloud):
+    fake_cloud.faults["arming"] = Faults(server_error=1.0)
+    fake_cloud.reset_stats()
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await _arm_away(hass)
+
+    assert hass.states.get(_panel_id(hass)).state == "disarmed"
+    assert not _hub_reads(fake_cloud)
+
+
+async def test_auth_failure_during_confirmation_clears_the_transitional_state(
+    hass, setup_entry, monkeypatch
+):
+    api = hass.data[DOMAIN][setup_entry.entry_id]["api"]
+    monkeypatch.setattr(api, "get_hub_info", AsyncMock(side_effect=ConfigEntryAuthFailed("expired")))
+
+    with pytest.raises(ConfigEntryAuthFailed):
+        await _arm_away(hass)
+
+    assert hass.states.get(_panel_id(hass)).state == "disarmed"
+    assert api.get_hub_info.await_count == 1
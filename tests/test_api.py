@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.ajax import api as api_module
+from custom_components.ajax.api import AjaxAPI
+from custom_components.ajax.const import READ_RETRIES
+from fake_cloud import Faults
+
+HUB_ID = "00000000"
+DEVICE_ID = "00000000"
+
+
+@pytest.fixture
+async def api(hass, fake_cloud, monkeypatch):
+    # Retry right away
+    monkeypatch.setattr(api_module, "RETRY_BACKOFF_BASE", 0)
+    session_token, refresh_token = fake_cloud.issue_tokens()
+    return AjaxAPI(
+        {
+            "session_token": session_token,
+            "refresh_token": refresh_token,
+            "user_id": "FAKEUSER",
+            "token_created_at": time.time(),
+        },
+        hass,
+        None,
+        async_get_clientsession(hass),
+    )
+
+
+async def test_concurrent_identical_reads_share_one_request(api, fake_cloud):
+    results = await asyncio.gather(*(api.get_device_info(HUB_ID, DEVICE_ID) for _ in range(5)))
+    assert fake_cloud.stats["requests"]["device_info"] == 1
+    assert all(result == results[0] for result in results)
+
+
+async def test_reads_are_served_from_the_cache(api, fake_cloud):
+    await api.get_hub_info(HUB_ID)
+    await api.get_hub_info(HUB_ID)
+    assert fake_cloud.stats["requests"]["hub_info"] == 1
+    await api.get_hub_info(HUB_ID, fresh=True)
+    assert fake_cloud.stats["requests"]["hub_info"] == 2
+
+
+async def test_commands_invalidate_the_hub(api, fake_cloud):
+    assert (await api.get_hub_info(HUB_ID))["state"] == "DISARMED"
+    await api.arm_hub(HUB_ID)
+    assert (await api.get_hub_info(HUB_ID))["state"] == "ARMED"
+    assert fake_cloud.stats["requests"]["hub_info"] == 2
+
+
+async def test_reads_are_retried_on_server_errors(api, fake_cloud):
+    fake_cloud.faults["hub_info"] = Faults(server_error=1.0)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await api.get_hub_info(HUB_ID)
+    assert fake_cloud.stats["requests"]["hub_info"] == READ_RETRIES + 1
+    assert api.metrics.errors["get_hub_info"] == READ_RETRIES + 1
+
+
+async def test_commands_are_not_retried(api, fake_cloud):
+    fake_cloud.faults["arming"] = Faults(server_error=1.0)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await api.arm_hub(HUB_ID)
+    assert fake_cloud.stats["requests"]["arming"] == 1
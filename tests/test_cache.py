@@ -0,0 +1,47 @@
+from custom_components.ajax.cache import ResponseCache
+
+HUB_INFO = ("get_hub_info", "HUB1")
+
+
+def test_entries_expire_after_the_endpoint_ttl(freezer):
+    cache = ResponseCache({"get_hub_info": 5}, 10)
+    cache.set(HUB_INFO, {"state": "DISARMED"}, cache.generation("HUB1"))
+    freezer.tick(4)
+    assert cache.get(HUB_INFO) == {"state": "DISARMED"}
+    freezer.tick(2)
+    assert cache.get(HUB_INFO) is None
+    assert cache.stats()["endpoints"]["get_hub_info"] == {"ttl": 5, "hits": 1, "misses": 1}
+
+
+def test_endpoints_without_ttl_are_not_stored():
+    cache = ResponseCache({}, 10)
+    cache.set(HUB_INFO, {"state": "DISARMED"}, 0)
+    assert cache.get(HUB_INFO) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache({"get_device_info": 60}, 2)
+    first, second, third = (("get_device_info", "HUB1", device_id) for device_id in "ABC")
+    cache.set(first, 1, 0)
+    cache.set(second, 2, 0)
+    assert cache.get(first) == 1
+    cache.set(third, 3, 0)
+    assert cache.get(second) is None
+    assert cache.get(first) == 1
+    assert cache.get(third) == 3
+
+
+def test_invalidating_a_hub_drops_its_entries_and_late_responses():
+    cache = ResponseCache({"get_hub_info": 5, "get_device_info": 60}, 10)
+    device = ("get_device_info", "HUB1", "A")
+    other_hub = ("get_hub_info", "HUB2")
+    cache.set(device, 1, cache.generation("HUB1"))
+    cache.set(other_hub, 2, cache.generation("HUB2"))
+    fetched_before = cache.generation("HUB1")
+
+    cache.invalidate_hub("HUB1")
+    assert cache.get(device) is None
+    assert cache.get(other_hub) == 2
+    # A read that was in flight during the command doesn't bring back stale state
+    cache.set(HUB_INFO, {"state": "DISARMED"}, fetched_before)
+    assert cache.get(HUB_INFO) is None
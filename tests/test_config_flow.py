@@ -0,0 +1,48 @@
+from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntryState
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.ajax import config_flow
+from custom_components.ajax.api import AjaxAPI
+from custom_components.ajax.const import DOMAIN
+
+
+async def test_reauth_keeps_the_loaded_entry_running(hass, setup_entry, fake_cloud, monkeypatch):
+    monkeypatch.setattr(config_flow, "DEFAULT_API_URL", AjaxAPI.base_url)
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    entity_ids = {
+        entity.entity_id for entity in er.async_entries_for_config_entry(er.async_get(hass), setup_entry.entry_id)
+    }
+
+    # The session expires and cannot be refreshed: polling stops and asks for reauth
+    fake_cloud._sessions.clear()
+    fake_cloud._refresh_tokens.clear()
+    data["api"].cache.clear()
+    for coordinator in data["coordinators"].values():
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+    await hass.async_block_till_done()
+    [flow] = hass.config_entries.flow.async_progress_by_handler(DOMAIN)
+    assert flow["context"]["source"] == SOURCE_REAUTH
+
+    fake_cloud.reset_stats()
+    result = await hass.config_entries.flow.async_configure(
+        flow["flow_id"], {"login": "user@example.com", "password": "hash"}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "reauth_successful"
+    assert setup_entry.state is ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][setup_entry.entry_id] is data
+    assert all(coordinator.last_update_success for coordinator in data["coordinators"].values())
+    assert {
+        entity.entity_id for entity in er.async_entries_for_config_entry(er.async_get(hass), setup_entry.entry_id)
+    } == entity_ids
+    states = [hass.states.get(entity_id) for entity_id in entity_ids]
+    assert all(state.state != STATE_UNAVAILABLE for state in states if state is not None)
+    # One login, then polling; nothing is enumerated again
+    assert fake_cloud.stats["requests"]["login"] == 1
+    assert not fake_cloud.stats["requests"]["hubs"]
+    assert not fake_cloud.stats["requests"]["hub_devices"]
@@ -0,0 +1,56 @@
+from custom_components.ajax.const import DEFAULT_CACHE_TTLS, DOMAIN, POLL_INTERVAL_FAST
+
+
+def _first_hub(hass, entry):
+    data = hass.data[DOMAIN][entry.entry_id]
+    return next(iter(data["coordinators"].values())), data["api"]
+
+
+def _device_reads(cloud, hub_id):
+    # Other hubs may poll meanwhile, only count the reads of this one
+    prefix = f"device_info:{hub_id}:"
+    return sum(count for target, count in cloud.stats["targets"].items() if target.startswith(prefix))
+
+
+async def test_every_fast_poll_reads_live_device_state(hass, setup_entry, fake_cloud, freezer):
+    coordinator, api = _first_hub(hass, setup_entry)
+    device_id = coordinator.device_ids[0]
+    await coordinator.async_refresh()
+    assert coordinator.data[device_id].reed_closed is True
+
+    fake_cloud.device_state[coordinator.hub_id][device_id]["reedClosed"] = False
+    # Less than a poll interval, so no scheduled poll runs meanwhile
+    ttl = DEFAULT_CACHE_TTLS["get_device_info"]
+    assert ttl < POLL_INTERVAL_FAST.total_seconds()
+    freezer.tick(ttl)
+    await coordinator.async_refresh()
+    assert coordinator.data[device_id].reed_closed is False
+
+
+async def test_reads_between_polls_are_served_from_the_cache(hass, setup_entry, fake_cloud):
+    coordinator, api = _first_hub(hass, setup_entry)
+    await coordinator.async_refresh()
+
+    fake_cloud.reset_stats()
+    hits = api.cache.hits.get("get_device_info", 0)
+    for device_id in coordinator.device_ids:
+        await api.get_device_info(coordinator.hub_id, device_id)
+    assert _device_reads(fake_cloud, coordinator.hub_id) == 0
+    assert api.cache.hits["get_device_info"] - hits == len(coordinator.device_ids)
+
+
+async def test_unchanged_devices_keep_their_record(hass, setup_entry, fake_cloud):
+    coordinator, api = _first_hub(hass, setup_entry)
+    api.cache.clear()
+    await coordinator.async_refresh()
+    before = dict(coordinator.data)
+
+    device_id = coordinator.device_ids[0]
+    fake_cloud.device_state[coordinator.hub_id][device_id]["temperature"] = 30
+    api.cache.clear()
+    await coordinator.async_refresh()
+
+    assert coordinator.changed_fields[device_id] == {"temperature"}
+    for other_id in coordinator.device_ids[1:]:
+        assert coordinator.data[other_id] is before[other_id]
+        assert not coordinator.changed_fields[other_id]
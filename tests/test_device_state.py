@@ -0,0 +1,33 @@
+from custom_components.ajax.device_state import (
+    AjaxDeviceState,
+    changed_fields,
+    device_summary,
+)
+
+PAYLOAD = {
+    "id": "0001",
+    "deviceName": "Door",
+    "deviceType": "DoorProtect",
+    "temperature": 21,
+    "reedClosed": True,
+    "someUnusedField": [1, 2, 3],
+}
+
+
+def test_only_known_fields_are_kept():
+    state = AjaxDeviceState(PAYLOAD)
+    assert state.temperature == 21
+    assert state.reed_closed is True
+    assert "someUnusedField" not in state.as_payload()
+    assert AjaxDeviceState(state.as_payload()) == state
+
+
+def test_changed_fields():
+    old = AjaxDeviceState(PAYLOAD)
+    assert changed_fields(old, AjaxDeviceState(dict(PAYLOAD))) == frozenset()
+    assert changed_fields(old, AjaxDeviceState({**PAYLOAD, "reedClosed": False})) == {"reed_closed"}
+    assert changed_fields(None, old) == frozenset(AjaxDeviceState.__slots__)
+
+
+def test_summary():
+    assert device_summary(PAYLOAD) == {"id": "0001", "deviceName": "Door", "deviceType": "DoorProtect"}
@@ -0,0 +1,80 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from custom_components.ajax.const import DOMAIN
+
+
+def _unique_ids(hass, entry):
+    return {entity.unique_id for entity in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)}
+
+
+async def test_sync_adds_and_removes_devices(hass, setup_entry, fake_cloud):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+    devices = fake_cloud.device_state[coordinator.hub_id]
+    removed_id, template_id = coordinator.device_ids[:2]
+    del devices[removed_id]
+    new_id = "0000FFFF"
+    devices[new_id] = {**devices[template_id], "id": new_id, "deviceName": "New detector"}
+    fake_cloud.reset_stats()
+
+    await data["discovery"].async_sync()
+    await hass.async_block_till_done()
+
+    assert new_id in coordinator.device_ids
+    assert removed_id not in coordinator.device_ids
+    assert new_id in coordinator.data and removed_id not in coordinator.data
+    # Only the new device was fetched
+    assert fake_cloud.stats["requests"]["device_info"] == 1
+    unique_ids = _unique_ids(hass, setup_entry)
+    assert any(unique_id.startswith(f"ajax_{new_id}") for unique_id in unique_ids)
+    assert not any(unique_id.startswith(f"ajax_{removed_id}") for unique_id in unique_ids)
+    assert dr.async_get(hass).async_get_device(identifiers={(DOMAIN, f"ajax_{removed_id}")}) is None
+
+
+async def test_unchanged_hubs_cost_no_device_requests(hass, setup_entry, fake_cloud):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    fake_cloud.reset_stats()
+    await data["discovery"].async_sync()
+    assert fake_cloud.stats["requests"]["device_info"] == 0
+    assert fake_cloud.stats["requests"]["hub_devices"] == len(data["coordinators"])
+
+
+@pytest.mark.parametrize("listed", [None, [], {"message": "Busy"}])
+async def test_empty_device_lists_keep_the_devices(hass, setup_entry, monkeypatch, listed):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+    device_ids = list(coordinator.device_ids)
+    monkeypatch.setattr(data["api"], "get_hub_devices", AsyncMock(return_value=listed))
+
+    await data["discovery"].async_sync()
+    await hass.async_block_till_done()
+
+    assert coordinator.device_ids == device_ids
+    assert set(coordinator.data) == set(device_ids)
+    assert any(unique_id.startswith(f"ajax_{device_ids[0]}") for unique_id in _unique_ids(hass, setup_entry))
+
+
+async def test_sync_adds_and_removes_hubs(hass, setup_entry, fake_cloud):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    new_hub = "0000FFFF"
+    fake_cloud.hub_state[new_hub] = {**fake_cloud.hub_state["00000000"], "id": new_hub, "name": "New hub"}
+    fake_cloud.device_state[new_hub] = {
+        f"FFFF{device_id[4:]}": {**device, "id": f"FFFF{device_id[4:]}"}
+        for device_id, device in fake_cloud.device_state["00000000"].items()
+    }
+    del fake_cloud.hub_state["00000001"]
+    del fake_cloud.device_state["00000001"]
+
+    await data["discovery"].async_sync()
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert set(data["coordinators"]) == {"00000000", new_hub}
+    assert len(data["coordinators"][new_hub].device_ids) == len(fake_cloud.device_state[new_hub])
+    unique_ids = _unique_ids(hass, setup_entry)
+    registry = dr.async_get(hass)
+    assert registry.async_get_device(identifiers={(DOMAIN, f"ajax_hub_{new_hub}")}) is not None
+    assert registry.async_get_device(identifiers={(DOMAIN, "ajax_hub_00000001")}) is None
+    assert not any(unique_id.startswith("ajax_0001") for unique_id in unique_ids)
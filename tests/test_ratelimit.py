@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from custom_components.ajax.ratelimit import LANE_COMMAND, LANE_POLL, AccountRateLimiter
+
+
+async def test_commands_go_ahead_of_queued_polls():
+    limiter = AccountRateLimiter(rate=20, burst=2)
+    await limiter.acquire(LANE_POLL)
+    await limiter.acquire(LANE_POLL)
+    order = []
+
+    async def take(lane, name):
+        await limiter.acquire(lane)
+        order.append(name)
+
+    polls = [asyncio.create_task(take(LANE_POLL, f"poll {i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    command = asyncio.create_task(take(LANE_COMMAND, "command"))
+    await asyncio.gather(*polls, command)
+    assert order == ["command", "poll 0", "poll 1", "poll 2"]
+
+
+async def test_polls_leave_the_command_reserve():
+    limiter = AccountRateLimiter(rate=0.01, burst=3, command_reserve=2)
+    assert await limiter.acquire(LANE_POLL) == 0
+    poll = asyncio.create_task(limiter.acquire(LANE_POLL))
+    await asyncio.sleep(0)
+    assert not poll.done()
+
+    # The two reserved tokens still go to commands right away
+    assert await limiter.acquire(LANE_COMMAND) < 0.1
+    assert await limiter.acquire(LANE_COMMAND) < 0.1
+
+    limiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await poll
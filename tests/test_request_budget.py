@@ -0,0 +1,94 @@
+"""Request budgets per phase and per entity class.
+
+Counts the API requests made during setup, during one polling cycle, and
+when only the entities of one class update, and checks the most any single
+hub or device got against the budgets below, so a change that brings back
+per-entity or N+1 fetching fails.
+"""
+import asyncio
+from collections import Counter
+
+import pytest
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+from custom_components.ajax.const import DOMAIN
+
+ENTITY_CLASSES = (
+    "AjaxBinarySensor",
+    "FireProtectBinarySensor",
+    "DoorProtectBinarySensor",
+    "MotionProtectBinarySensor",
+    "AjaxSensor",
+    "FireProtectSensor",
+    "DoorProtectSensor",
+    "MotionProtectSensor",
+    "AjaxAlarmPanel",
+)
+
+# Max requests to a single target (one hub, or one device) per phase
+BUDGETS = {
+    "setup": {"hubs": 1, "hub_devices": 1, "device_info": 1, "hub_info": 1},
+    "cycle": {"hubs": 0, "hub_devices": 0, "device_info": 1, "hub_info": 1},
+    "entity_class": {"hubs": 0, "hub_devices": 0, "device_info": 1, "hub_info": 1},
+}
+
+
+def _per_target_max(cloud):
+    """Highest number of requests any single hub or device got, per endpoint."""
+    result = Counter()
+    for target, count in cloud.stats["targets"].items():
+        endpoint = target.split(":", 1)[0]
+        result[endpoint] = max(result[endpoint], count)
+    # get_hubs has no target, it is account-wide
+    result["hubs"] = cloud.stats["requests"]["hubs"]
+    return result
+
+
+def _over_budget(phase, cloud):
+    counts = _per_target_max(cloud)
+    return {
+        endpoint: counts[endpoint]
+        for endpoint, limit in BUDGETS[phase].items()
+        if counts[endpoint] > limit
+    }
+
+
+def _cancel_debounced_refreshes(coordinators):
+    for coordinator in coordinators.values():
+        coordinator._debounced_refresh.async_cancel()
+
+
+async def test_setup(setup_entry, fake_cloud):
+    assert _over_budget("setup", fake_cloud) == {}
+
+
+async def test_polling_cycle(hass, setup_entry, fake_cloud):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinators = data["coordinators"]
+    _cancel_debounced_refreshes(coordinators)
+    data["api"].cache.clear()
+    fake_cloud.reset_stats()
+
+    await asyncio.gather(*(c.async_refresh() for c in coordinators.values()))
+    assert _over_budget("cycle", fake_cloud) == {}
+
+
+@pytest.mark.parametrize("entity_class", ENTITY_CLASSES)
+async def test_entity_class(hass, setup_entry, fake_cloud, entity_class):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    entities = [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+        if type(entity).__name__ == entity_class
+    ]
+    if not entities:
+        pytest.skip(f"No {entity_class} for the fake devices")
+    _cancel_debounced_refreshes(data["coordinators"])
+    data["api"].cache.clear()
+    fake_cloud.reset_stats()
+
+    await asyncio.gather(*(entity.async_update() for entity in entities))
+    await hass.async_block_till_done()
+    assert _over_budget("entity_class", fake_cloud) == {}
+    _cancel_debounced_refreshes(data["coordinators"])
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from custom_components.ajax import stream as stream_module
+from custom_components.ajax.api import EventStreamUnsupported
+from custom_components.ajax.const import DOMAIN
+from custom_components.ajax.stream import AjaxEventStream
+from custom_components.ajax.trace import trace
+
+
+async def _lines(*lines, error=None):
+    for line in lines:
+        yield line
+    if error is not None:
+        raise error
+
+
+def _response(*lines, error=None):
+    return SimpleNamespace(content=_lines(*lines, error=error), close=lambda: None)
+
+
+def _event(payload):
+    return f"data: {json.dumps(payload)}\n".encode()
+
+
+async def test_events_are_applied_to_the_hub(hass, setup_entry):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+    device_id = coordinator.device_ids[0]
+    stream = AjaxEventStream(hass, setup_entry, data["api"])
+
+    await stream._consume(
+        _response(
+            b": ping\n",
+            b"\n",
+            # Split over two data lines
+            b'data: {"type": "hub", "hub_id": "00000000",\n',
+            b'data: "hub": {"state": "ARMED"}}\n',
+            b"\n",
+            _event({"type": "device", "hub_id": "00000000", "device": {"id": device_id, "temperature": 30}}),
+            b"\n",
+            b"data: {not json\n",
+            b"\n",
+        )
+    )
+
+    assert stream.connected and coordinator.push_connected
+    assert stream.events == 2
+    assert coordinator.hub_info["state"] == "ARMED"
+    assert coordinator.data[device_id].temperature == 30
+    assert coordinator.changed_fields[device_id] == {"temperature"}
+
+
+async def test_events_are_applied_while_tracing(hass, setup_entry, monkeypatch):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+    monkeypatch.setattr(trace, "enabled", True)
+    stream = AjaxEventStream(hass, setup_entry, data["api"])
+
+    await stream._consume(
+        _response(_event({"type": "hub", "hub_id": "00000000", "hub": {"state": "ARMED"}}), b"\n")
+    )
+
+    assert stream.events == 1
+    assert coordinator.hub_info["state"] == "ARMED"
+
+
+async def test_a_response_without_events_is_not_connected(hass, setup_entry):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    stream = AjaxEventStream(hass, setup_entry, data["api"])
+    await stream._consume(_response())
+    assert not stream.connected
+    assert stream.connects == 0
+
+
+async def test_unexpected_errors_fall_back_to_polling(hass, setup_entry, monkeypatch):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+    monkeypatch.setattr(stream_module, "EVENT_STREAM_RETRY_MIN", 0)
+    api = data["api"]
+    monkeypatch.setattr(
+        api,
+        "open_event_stream",
+        AsyncMock(
+            side_effect=[
+                _response(b": ping\n", error=ValueError("Chunk too big")),
+                EventStreamUnsupported("gone"),
+            ]
+        ),
+    )
+    stream = AjaxEventStream(hass, setup_entry, api)
+
+    await stream._run()
+
+    assert stream.connects == 1
+    assert not stream.connected
+    assert not coordinator.push_connected
+    assert api.open_event_stream.await_count == 2
+
+
+async def test_unload_stops_the_stream_without_polling(hass, fake_cloud, setup_entry, monkeypatch):
+    data = hass.data[DOMAIN][setup_entry.entry_id]
+    coordinator = data["coordinators"]["00000000"]
+
+    async def _lines_forever():
+        yield b": ping\n"
+        await asyncio.Event().wait()
+
+    api = data["api"]
+    monkeypatch.setattr(
+        api,
+        "open_event_stream",
+        AsyncMock(return_value=SimpleNamespace(content=_lines_forever(), close=lambda: None)),
+    )
+    stream = data["event_stream"]
+    stream.async_start()
+    await hass.async_block_till_done()
+    assert stream.connected and coordinator.push_connected
+
+    fake_cloud.reset_stats()
+    assert await hass.config_entries.async_unload(setup_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert setup_entry.entry_id not in hass.data[DOMAIN]
+    # Cancelled, not dropped: the coordinators are not sent back to polling
+    assert coordinator.push_connected
+    assert not fake_cloud.stats["requests"]
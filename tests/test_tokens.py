@@ -0,0 +1,92 @@
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.ajax.api import AjaxAPI
+from custom_components.ajax.const import DOMAIN
+from custom_components.ajax.tokens import AjaxTokenStore, newest_tokens
+
+ENTRY_ID = "entry"
+STORAGE_KEY = f"{DOMAIN}.{ENTRY_ID}.tokens"
+
+
+@pytest.fixture
+async def api(hass, fake_cloud, hass_storage):
+    session_token, refresh_token = fake_cloud.issue_tokens()
+    token_store = AjaxTokenStore(hass, ENTRY_ID)
+    token_store.async_save = AsyncMock(wraps=token_store.async_save)
+    token_store.async_delay_save = Mock(wraps=token_store.async_delay_save)
+    return AjaxAPI(
+        {
+            "session_token": session_token,
+            "refresh_token": refresh_token,
+            "user_id": "FAKEUSER",
+            "token_created_at": time.time(),
+        },
+        hass,
+        None,
+        async_get_clientsession(hass),
+        token_store=token_store,
+    )
+
+
+async def test_refresh_without_rotation_only_schedules_a_save(api, fake_cloud, hass_storage):
+    fake_cloud.rotate_refresh_tokens = False
+    refresh_token = api.refresh_token
+
+    assert await api.update_refresh_token()
+
+    assert api.refresh_token == refresh_token
+    api.token_store.async_save.assert_not_awaited()
+    api.token_store.async_delay_save.assert_called_once_with(api.tokens)
+    assert STORAGE_KEY not in hass_storage
+
+
+async def test_rotated_refresh_token_is_saved_right_away(api, hass_storage):
+    refresh_token = api.refresh_token
+
+    assert await api.update_refresh_token()
+
+    assert api.refresh_token != refresh_token
+    api.token_store.async_save.assert_awaited_once()
+    assert hass_storage[STORAGE_KEY]["data"] == api.tokens()
+
+
+def test_stored_tokens_win_only_when_newer():
+    entry_data = {"session_token": "entry", "token_created_at": 100, "user_id": "FAKEUSER"}
+    assert newest_tokens(entry_data, None) is entry_data
+    assert newest_tokens(entry_data, {"session_token": "stored", "token_created_at": 50}) is entry_data
+    assert newest_tokens(entry_data, {"session_token": "stored", "token_created_at": 150}) == {
+        **entry_data,
+        "session_token": "stored",
+        "token_created_at": 150,
+    }
+
+
+@pytest.mark.parametrize(("age", "expected"), [(-60, "stored"), (60, "entry")])
+async def test_setup_uses_the_newest_tokens(hass, config_entry, fake_cloud, hass_storage, age, expected):
+    session_token, refresh_token = fake_cloud.issue_tokens()
+    stored = {
+        "session_token": session_token,
+        "refresh_token": refresh_token,
+        "token_created_at": config_entry.data["token_created_at"] - age,
+    }
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}.tokens"] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.{config_entry.entry_id}.tokens",
+        "data": stored,
+    }
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    api = hass.data[DOMAIN][config_entry.entry_id]["api"]
+    tokens = stored if expected == "stored" else config_entry.data
+    assert api.session_token == tokens["session_token"]
+    assert api.refresh_token == tokens["refresh_token"]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
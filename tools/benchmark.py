@@ -0,0 +1,246 @@
+"""Setup and polling benchmark for the Ajax integration.
+
+Runs the integration inside a throwaway Home Assistant instance against the
+in-process fake cloud from ``fake_cloud.py`` and reports, as JSON:
+
+* wall-clock time of ``async_setup_entry`` for N hubs x M devices, without a
+  stored snapshot (cold) and with one (warm);
+* HTTP requests and response bytes per endpoint for one polling cycle, and per
+  entity platform when only that platform's entities update;
+* memory held by ``hass.data[DOMAIN][entry_id]`` after setup and after
+  polling.
+
+Needs Home Assistant and pytest-homeassistant-custom-component installed::
+
+    python tools/benchmark.py --hubs 3 --devices 80 --output bench.json
+    python tools/benchmark.py --hubs 3 --devices 80 --baseline bench.json
+
+With ``--baseline`` every numeric result is compared with an earlier run and
+the script exits with status 1 when one grew by more than ``--tolerance``.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp.resolver import AsyncResolver
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import async_get_platforms
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from custom_components.ajax.api import AjaxAPI  # noqa: E402
+from custom_components.ajax.const import DOMAIN  # noqa: E402
+from fake_cloud import ENDPOINTS, FakeAjaxCloud, Latency  # noqa: E402
+
+# Not part of the integration's own state, so not counted in its memory
+_SHARED_TYPES = (
+    HomeAssistant,
+    ConfigEntry,
+    aiohttp.ClientSession,
+    logging.Logger,
+    asyncio.AbstractEventLoop,
+    asyncio.Lock,
+)
+
+
+def deep_size(obj, seen=None):
+    """Approximate bytes reachable from ``obj``, not following shared HA objects."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _SHARED_TYPES) or callable(obj):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def _snapshot_stats(cloud):
+    return {
+        "requests": dict(cloud.stats["requests"]),
+        "bytes": dict(cloud.stats["bytes"]),
+        "total_requests": sum(cloud.stats["requests"].values()),
+        "total_bytes": sum(cloud.stats["bytes"].values()),
+    }
+
+
+async def _setup(hass, cloud, entry):
+    cloud.reset_stats()
+    start = time.perf_counter()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    setup_time = time.perf_counter() - start
+    # Includes background work started by setup, like the snapshot check
+    await hass.async_block_till_done(wait_background_tasks=True)
+    settled_time = time.perf_counter() - start
+    return {
+        "setup_seconds": round(setup_time, 4),
+        "settled_seconds": round(settled_time, 4),
+        **_snapshot_stats(cloud),
+    }
+
+
+def _cancel_debounced_refreshes(coordinators):
+    for coordinator in coordinators.values():
+        coordinator._debounced_refresh.async_cancel()
+
+
+async def _poll_cycle(hass, cloud, entry):
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = data["coordinators"]
+    result = {}
+
+    # A full cycle: every hub coordinator refreshes once, as on its timer
+    data["api"].cache.clear()
+    cloud.reset_stats()
+    await asyncio.gather(*(c.async_refresh() for c in coordinators.values()))
+    result["cycle"] = _snapshot_stats(cloud)
+
+    # What each platform costs when only its entities ask for an update
+    result["per_platform"] = {}
+    for platform in async_get_platforms(hass, DOMAIN):
+        data["api"].cache.clear()
+        _cancel_debounced_refreshes(coordinators)
+        cloud.reset_stats()
+        # Polling entities, like the API metric sensors, make no requests
+        entities = [e for e in platform.entities.values() if hasattr(e, "async_update")]
+        await asyncio.gather(*(entity.async_update() for entity in entities))
+        await hass.async_block_till_done()
+        result["per_platform"][platform.domain] = {
+            "entities": len(entities),
+            **_snapshot_stats(cloud),
+        }
+    _cancel_debounced_refreshes(coordinators)
+    return result
+
+
+async def run(args):
+    cloud = FakeAjaxCloud(
+        hubs=args.hubs,
+        devices_per_hub=args.devices,
+        latency={endpoint: Latency.parse(args.latency) for endpoint in ENDPOINTS},
+        seed=args.seed,
+        # An open event stream is a background task that never ends, and
+        # setup is timed until background tasks are done
+        stream=False,
+    )
+    url = await cloud.start()
+    AjaxAPI.base_url = url
+    session_token, refresh_token = cloud.issue_tokens()
+
+    # The shared client session resolves through zeroconf, which needs the
+    # network integration; plain DNS is enough for the local fake cloud, as in
+    # the pytest plugin's mock_zeroconf_resolver
+    resolver = patch(
+        "homeassistant.helpers.aiohttp_client._async_make_resolver",
+        return_value=AsyncResolver(),
+    )
+    with tempfile.TemporaryDirectory() as config_dir, resolver:
+        async with async_test_home_assistant(config_dir=config_dir) as hass:
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                data={
+                    "session_token": session_token,
+                    "refresh_token": refresh_token,
+                    "user_id": "FAKEUSER",
+                    "token_created_at": time.time(),
+                },
+            )
+            entry.add_to_hass(hass)
+
+            results = {
+                "params": {"hubs": args.hubs, "devices_per_hub": args.devices, "latency": args.latency},
+                "setup_cold": await _setup(hass, cloud, entry),
+            }
+            gc.collect()
+            after_setup = deep_size(hass.data[DOMAIN][entry.entry_id])
+            results["polling"] = await _poll_cycle(hass, cloud, entry)
+            gc.collect()
+            after_polling = deep_size(hass.data[DOMAIN][entry.entry_id])
+            results["memory"] = {
+                "entry_data_bytes_after_setup": after_setup,
+                "entry_data_bytes_after_polling": after_polling,
+                "entry_data_bytes_peak": max(after_setup, after_polling),
+            }
+
+            # Second start, from the snapshot written by the first one
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            results["setup_warm"] = await _setup(hass, cloud, entry)
+
+            await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+    await cloud.stop()
+    return results
+
+
+def _flatten(results, prefix=""):
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(results, baseline, tolerance):
+    """Return the metrics that grew by more than ``tolerance`` over the baseline."""
+    previous = dict(_flatten(baseline))
+    regressions = {}
+    for name, value in _flatten(results):
+        if name.startswith("params.") or name not in previous:
+            continue
+        if value > previous[name] * (1 + tolerance) if previous[name] else value > 0:
+            regressions[name] = {"baseline": previous[name], "current": value}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hubs", type=int, default=3)
+    parser.add_argument("--devices", type=int, default=20, help="devices per hub")
+    parser.add_argument("--latency", default="fixed:0.02", help="latency of every endpoint, see fake_cloud.py")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative growth")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.baseline:
+        results["regressions"] = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(text)
+    print(text)
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
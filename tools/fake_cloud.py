@@ -0,0 +1,452 @@
+"""Local stand-in for the Ajax cloud proxy used by the integration.
+
+Implements the endpoints ``AjaxAPI`` and the config flow talk to, with a
+configurable number of hubs and devices, per-endpoint latency, injected
+failures and token expiry, so setup and polling can be exercised and measured
+offline::
+
+    python tools/fake_cloud.py --hubs 20 --devices 40 --latency device_info=uniform:0.05,0.4 \
+        --fault hub_info=server_error:0.05 --token-ttl 120
+
+``/api/events`` is a server-sent event stream of device and hub changes:
+arming commands and ``--churn`` are pushed to it, ``--push-interval`` makes
+random devices report motion or an opened door, and ``--stream-ttl`` closes
+every stream after that many seconds to exercise the polling fallback.
+
+Point the integration at it by overriding ``DEFAULT_API_URL`` (or
+``AjaxAPI.base_url``). It can also be started in-process from a benchmark or
+test script with ``FakeAjaxCloud(...).start()``; ``stats`` then holds request
+and byte counters per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+ENDPOINTS = (
+    "login",
+    "refresh",
+    "hubs",
+    "hub_info",
+    "hub_devices",
+    "device_info",
+    "arming",
+    "events",
+)
+
+DEVICE_TYPES = (
+    "DoorProtect",
+    "DoorProtectPlus",
+    "MotionProtect",
+    "MotionProtectPlus",
+    "FireProtectPlus",
+    "GlassProtect",
+    "LeaksProtect",
+    "HomeSiren",
+)
+
+COMMAND_STATES = {
+    "ARM": "ARMED",
+    "DISARM": "DISARMED",
+    "NIGHT_MODE_ON": "NIGHT_MODE",
+}
+
+NOT_AUTHORIZED = {"message": "User is not authorized"}
+
+
+@dataclass
+class Latency:
+    """Delay distribution of an endpoint: ``fixed:S``, ``uniform:A,B`` or ``lognormal:MU,SIGMA``."""
+
+    kind: str = "fixed"
+    params: tuple = (0.0,)
+
+    @classmethod
+    def parse(cls, spec):
+        kind, _, params = spec.partition(":")
+        return cls(kind, tuple(float(p) for p in params.split(",")))
+
+    def sample(self, rng=random):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(*self.params)
+        raise ValueError(f"Unknown latency distribution {self.kind}")
+
+
+@dataclass
+class Faults:
+    """Probabilities of injected failures for an endpoint."""
+
+    unauthorized: float = 0.0  # HTTP 401
+    not_authorized_body: float = 0.0  # 200 with {"message": "User is not authorized"}
+    server_error: float = 0.0  # HTTP 503
+
+    def pick(self, rng=random):
+        roll = rng.random()
+        for name in ("unauthorized", "not_authorized_body", "server_error"):
+            roll -= getattr(self, name)
+            if roll < 0:
+                return name
+        return None
+
+
+@dataclass
+class FakeAjaxCloud:
+    hubs: int = 1
+    devices_per_hub: int = 10
+    latency: dict = field(default_factory=dict)
+    faults: dict = field(default_factory=dict)
+    token_ttl: float = 14 * 60
+    rotate_refresh_tokens: bool = True  # without it a refresh keeps the refresh token
+    churn: float = 0.0  # chance that a device_info response shows changed state
+    origin_hit_ratio: float = 0.5
+    push_interval: float = 0.0  # seconds between pushed random changes, 0 = none
+    stream_ttl: float = 0.0  # close event streams after this many seconds, 0 = never
+    heartbeat: float = 15.0
+    stream: bool = True  # without it /api/events is a 404, as on older proxies
+    seed: int | None = None
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+        # "targets" counts requests per endpoint:hub_id[:device_id]
+        self.stats = {
+            "requests": Counter(),
+            "bytes": Counter(),
+            "faults": Counter(),
+            "targets": Counter(),
+            "events": Counter(),  # pushed on event streams, per type
+        }
+        self._sessions = {}  # session token -> expiry
+        self._refresh_tokens = set()
+        self._runner = None
+        self._subscribers = set()
+        self._pusher = None
+        self.hub_state = {}
+        self.device_state = {}
+        for h in range(self.hubs):
+            hub_id = f"{h:08X}"
+            self.hub_state[hub_id] = {
+                "id": hub_id,
+                "name": f"Hub {h}",
+                "state": "DISARMED",
+                "hubSubtype": "HUB_2_4G",
+                "firmware": {"version": "2.30.0"},
+            }
+            self.device_state[hub_id] = {}
+            for d in range(self.devices_per_hub):
+                device_id = f"{h:04X}{d:04X}"
+                device_type = DEVICE_TYPES[d % len(DEVICE_TYPES)]
+                self.device_state[hub_id][device_id] = {
+                    "id": device_id,
+                    "deviceName": f"{device_type} {d}",
+                    "deviceType": device_type,
+                    "firmwareVersion": "5.55.0.0",
+                    "batteryChargeLevelPercentage": 100,
+                    "temperature": 21,
+                    "reedClosed": True,
+                    "extraContactClosed": False,
+                    "smokeAlarmDetected": False,
+                    "coAlarmDetected": False,
+                    "temperatureAlarmDetected": False,
+                    "highTemperatureDiffDetected": False,
+                    "state": "PASSIVE",
+                }
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/api/login", self._login)
+        app.router.add_post("/api/refresh", self._refresh)
+        app.router.add_get("/api/hubs", self._hubs)
+        app.router.add_post("/api/hub_info", self._hub_info)
+        app.router.add_post("/api/hub_devices", self._hub_devices)
+        app.router.add_post("/api/device_info", self._device_info)
+        app.router.add_post("/api/hub/arming", self._arming)
+        if self.stream:
+            app.router.add_post("/api/events", self._events)
+        app.router.add_get("/_stats", self._stats)
+        app.on_startup.append(self._start_pusher)
+        app.on_cleanup.append(self._stop_pusher)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serve in the running event loop and return the base URL."""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def issue_tokens(self):
+        session_token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        self._sessions[session_token] = time.monotonic() + self.token_ttl
+        self._refresh_tokens.add(refresh_token)
+        return session_token, refresh_token
+
+    def reset_stats(self):
+        for counter in self.stats.values():
+            counter.clear()
+
+    def publish(self, event):
+        """Send an event to every open event stream."""
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def change_device(self, hub_id, device_id, **fields):
+        """Change the state of a device and push the change."""
+        self.device_state[hub_id][device_id].update(fields)
+        self.publish({"type": "device", "hub_id": hub_id, "device": {"id": device_id, **fields}})
+
+    async def _start_pusher(self, app):
+        if self.push_interval > 0:
+            self._pusher = asyncio.create_task(self._push_random_changes())
+
+    async def _stop_pusher(self, app):
+        if self._pusher:
+            self._pusher.cancel()
+            self._pusher = None
+
+    async def _push_random_changes(self):
+        while True:
+            await asyncio.sleep(self.push_interval)
+            hub_id = self._random.choice(list(self.device_state))
+            if not self.device_state[hub_id]:
+                continue
+            device_id = self._random.choice(list(self.device_state[hub_id]))
+            device = self.device_state[hub_id][device_id]
+            if device["deviceType"].startswith("Motion"):
+                self.change_device(hub_id, device_id, motionDetected=not device.get("motionDetected", False))
+            else:
+                self.change_device(hub_id, device_id, reedClosed=not device["reedClosed"])
+
+    # Request handling
+
+    async def _handle(self, endpoint, request, authenticated=True):
+        self.stats["requests"][endpoint] += 1
+        body = await request.json() if request.can_read_body else {}
+        if "hub_id" in body:
+            target = ":".join(str(body[key]) for key in ("hub_id", "device_id") if key in body)
+            self.stats["targets"][f"{endpoint}:{target}"] += 1
+        await asyncio.sleep(self.latency.get(endpoint, Latency()).sample(self._random))
+        fault = self.faults.get(endpoint, Faults()).pick(self._random)
+        if fault:
+            self.stats["faults"][f"{endpoint}:{fault}"] += 1
+        if fault == "unauthorized":
+            return None, self._respond(endpoint, {"message": "Unauthorized"}, status=401)
+        if fault == "server_error":
+            return None, self._respond(endpoint, {"message": "Service unavailable"}, status=503)
+        if fault == "not_authorized_body":
+            return None, self._respond(endpoint, NOT_AUTHORIZED)
+        if authenticated:
+            expiry = self._sessions.get(body.get("session_token"))
+            if expiry is None or expiry < time.monotonic():
+                return None, self._respond(endpoint, NOT_AUTHORIZED)
+        return body, None
+
+    def _respond(self, endpoint, payload=None, status=200, headers=None):
+        text = "" if payload is None else json.dumps(payload)
+        self.stats["bytes"][endpoint] += len(text)
+        if payload is None:
+            return web.Response(status=status, headers=headers)
+        return web.Response(status=status, text=text, content_type="application/json", headers=headers)
+
+    async def _login(self, request):
+        body, error = await self._handle("login", request, authenticated=False)
+        if error is not None:
+            return error
+        if not body.get("login") or not body.get("passwordHash"):
+            return self._respond("login", {"message": "Wrong login or password"}, status=401)
+        session_token, refresh_token = self.issue_tokens()
+        return self._respond("login", {
+            "sessionToken": session_token,
+            "refreshToken": refresh_token,
+            "userId": "FAKEUSER",
+        })
+
+    async def _refresh(self, request):
+        body, error = await self._handle("refresh", request, authenticated=False)
+        if error is not None:
+            return error
+        refresh_token = body.get("refresh_token")
+        if refresh_token not in self._refresh_tokens:
+            return self._respond("refresh", NOT_AUTHORIZED, status=401)
+        if self.rotate_refresh_tokens:
+            self._refresh_tokens.discard(refresh_token)
+            session_token, refresh_token = self.issue_tokens()
+        else:
+            session_token = secrets.token_hex(16)
+            self._sessions[session_token] = time.monotonic() + self.token_ttl
+        return self._respond("refresh", {
+            "sessionToken": session_token,
+            "refreshToken": refresh_token,
+            "userId": body.get("user_id"),
+        })
+
+    async def _hubs(self, request):
+        _, error = await self._handle("hubs", request)
+        if error is not None:
+            return error
+        return self._respond("hubs", [
+            {"hubId": hub_id, "hubBindingRole": "USER"} for hub_id in self.hub_state
+        ])
+
+    async def _hub_info(self, request):
+        body, error = await self._handle("hub_info", request)
+        if error is not None:
+            return error
+        hub = self.hub_state.get(body.get("hub_id"))
+        if hub is None:
+            return self._respond("hub_info", {"message": "Hub not found"}, status=404)
+        return self._respond("hub_info", hub)
+
+    async def _hub_devices(self, request):
+        body, error = await self._handle("hub_devices", request)
+        if error is not None:
+            return error
+        devices = self.device_state.get(body.get("hub_id"))
+        if devices is None:
+            return self._respond("hub_devices", {"message": "Hub not found"}, status=404)
+        if not devices:
+            return self._respond("hub_devices", status=204)
+        return self._respond("hub_devices", [
+            {"id": d["id"], "deviceName": d["deviceName"], "deviceType": d["deviceType"]}
+            for d in devices.values()
+        ])
+
+    async def _device_info(self, request):
+        body, error = await self._handle("device_info", request)
+        if error is not None:
+            return error
+        device = self.device_state.get(body.get("hub_id"), {}).get(body.get("device_id"))
+        if device is None:
+            return self._respond("device_info", {"message": "Device not found"}, status=404)
+        if self.churn and self._random.random() < self.churn:
+            self.change_device(
+                body["hub_id"],
+                device["id"],
+                reedClosed=not device["reedClosed"],
+                temperature=18 + self._random.randint(0, 8),
+            )
+        hit = "1" if self._random.random() < self.origin_hit_ratio else "0"
+        return self._respond("device_info", device, headers={"X-Ajax-Origin-Hit": hit})
+
+    async def _arming(self, request):
+        body, error = await self._handle("arming", request)
+        if error is not None:
+            return error
+        hub = self.hub_state.get(body.get("hub_id"))
+        state = COMMAND_STATES.get(body.get("command"))
+        if hub is None or state is None:
+            return self._respond("arming", {"message": "Bad command"}, status=400)
+        hub["state"] = state
+        self.publish({"type": "hub", "hub_id": hub["id"], "hub": {"state": state}})
+        return self._respond("arming", status=204)
+
+    async def _events(self, request):
+        _, error = await self._handle("events", request)
+        if error is not None:
+            return error
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        deadline = time.monotonic() + self.stream_ttl if self.stream_ttl else None
+        try:
+            while True:
+                timeout = self.heartbeat
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.monotonic())
+                    if timeout <= 0:
+                        break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    chunk = b": ping\n\n"
+                else:
+                    chunk = f"data: {json.dumps(event)}\n\n".encode()
+                    self.stats["events"][event["type"]] += 1
+                self.stats["bytes"]["events"] += len(chunk)
+                await response.write(chunk)
+        except ConnectionResetError:
+            pass
+        finally:
+            self._subscribers.discard(queue)
+        return response
+
+    async def _stats(self, request):
+        return web.json_response({name: dict(counter) for name, counter in self.stats.items()})
+
+
+def _parse_per_endpoint(values, parse):
+    """Parse ``endpoint=spec`` options; ``*`` applies a spec to every endpoint."""
+    result = {}
+    for value in values or []:
+        endpoint, _, spec = value.partition("=")
+        for name in ENDPOINTS if endpoint == "*" else (endpoint,):
+            if name not in ENDPOINTS:
+                raise SystemExit(f"Unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}")
+            result[name] = parse(spec, result.get(name))
+    return result
+
+
+def _parse_fault(spec, current):
+    faults = current or Faults()
+    for part in spec.split(","):
+        name, _, probability = part.partition(":")
+        setattr(faults, name, float(probability))
+    return faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--hubs", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=10, help="devices per hub")
+    parser.add_argument(
+        "--latency", action="append", metavar="ENDPOINT=SPEC",
+        help="e.g. device_info=uniform:0.05,0.3 or *=lognormal:-2.5,0.5",
+    )
+    parser.add_argument(
+        "--fault", action="append", metavar="ENDPOINT=NAME:P[,NAME:P]",
+        help="NAME is unauthorized, not_authorized_body or server_error",
+    )
+    parser.add_argument("--token-ttl", type=float, default=14 * 60, help="session token lifetime (s)")
+    parser.add_argument("--churn", type=float, default=0.0, help="chance a device changes per read")
+    parser.add_argument("--push-interval", type=float, default=0.0, help="seconds between pushed device changes")
+    parser.add_argument("--no-stream", action="store_true", help="serve no event stream")
+    parser.add_argument("--stream-ttl", type=float, default=0.0, help="close event streams after this many seconds")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    cloud = FakeAjaxCloud(
+        hubs=args.hubs,
+        devices_per_hub=args.devices,
+        latency=_parse_per_endpoint(args.latency, lambda spec, _: Latency.parse(spec)),
+        faults=_parse_per_endpoint(args.fault, _parse_fault),
+        token_ttl=args.token_ttl,
+        churn=args.churn,
+        push_interval=args.push_interval,
+        stream_ttl=args.stream_ttl,
+        stream=not args.no_stream,
+        seed=args.seed,
+    )
+    web.run_app(cloud.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()